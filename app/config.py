@@ -3,32 +3,37 @@ Configuration management for the weather station application.
 Loads settings from environment variables with sensible defaults.
 """
 import os
-import json
 import logging
-from typing import Optional
+from dataclasses import dataclass, field
 from pathlib import Path
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True, slots=True)
 class MQTTConfig:
     """MQTT broker connection configuration."""
     
-    def __init__(self):
-        self.host: str = os.getenv("MQTT_HOST", "mosquitto")
-        self.port: int = int(os.getenv("MQTT_PORT", "1883"))
-        self.topic: str = os.getenv("MQTT_TOPIC", "pse/weather_system/sensors")
-        
-        # Authentication (optional, currently not used)
-        self.username: str | None = os.getenv("MQTT_USERNAME")
-        self.password: str | None = os.getenv("MQTT_PASSWORD")
-        
-        # Connection settings
-        self.keepalive: int = int(os.getenv("MQTT_KEEPALIVE", "60"))
-        self.client_id: str = os.getenv("MQTT_CLIENT_ID", "weather_station_python")
-        
-        # QoS levels
-        self.qos: int = int(os.getenv("MQTT_QOS", "1"))  # 0=at most once, 1=at least once, 2=exactly once
+    host: str = field(default_factory=lambda: os.environ.get("MQTT_HOST", "mosquitto"))
+    port: int = field(default_factory=lambda: int(os.environ.get("MQTT_PORT", "1883")))
+    topic: str = field(
+        default_factory=lambda: os.environ.get("MQTT_TOPIC", "pse/weather_system/sensors")
+    )
+    
+    # Authentication (optional, currently not used)
+    username: str | None = field(default_factory=lambda: os.environ.get("MQTT_USERNAME"))
+    password: str | None = field(default_factory=lambda: os.environ.get("MQTT_PASSWORD"))
+    
+    # Connection settings
+    keepalive: int = field(default_factory=lambda: int(os.environ.get("MQTT_KEEPALIVE", "60")))
+    client_id: str = field(
+        default_factory=lambda: os.environ.get("MQTT_CLIENT_ID", "weather_station_python")
+    )
+    
+    # QoS levels
+    qos: int = field(default_factory=lambda: int(os.environ.get("MQTT_QOS", "1")))  # 0=at most once, 1=at least once, 2=exactly once
     
     def __repr__(self) -> str:
         """String representation (hides password)."""
@@ -38,38 +43,56 @@ class MQTTConfig:
         )
 
 
+@dataclass(frozen=True, slots=True)
 class InfluxDBConfig:
     """InfluxDB 3 Core connection configuration."""
     
-    def __init__(self):
-        self.host: str = os.getenv("INFLUX_HOST", "influxdb3-core-pse")
-        self.port: int = int(os.getenv("INFLUX_PORT", "8181"))
-        
-        # Database and organization
-        self.database: str = os.getenv("INFLUX_DATABASE", "weather_station")
-        self.org: str = os.getenv("INFLUX_ORG", "pse")
-        
-        # Measurement (table) name
-        self.measurement: str = os.getenv("INFLUX_MEASUREMENT", "weather_data")
-        
-        # Token handling: try env var first, then fall back to token.json
-        self.token: str = self._load_token()
-        
-        # Connection URL
-        self.url: str = f"http://{self.host}:{self.port}"
+    host: str = field(default_factory=lambda: os.environ.get("INFLUX_HOST", "influxdb3-core-pse"))
+    port: int = field(default_factory=lambda: int(os.environ.get("INFLUX_PORT", "8181")))
+    
+    # Database and organization
+    database: str = field(
+        default_factory=lambda: os.environ.get("INFLUX_DATABASE", "weather_station")
+    )
+    org: str = field(default_factory=lambda: os.environ.get("INFLUX_ORG", "pse"))
     
-    def _load_token(self) -> str:
+    # Measurement (table) name
+    measurement: str = field(
+        default_factory=lambda: os.environ.get("INFLUX_MEASUREMENT", "weather_data")
+    )
+    
+    # Connection URL (derived from host and port)
+    url: str = field(init=False)
+    
+    # Token cache, filled on first access of ``token``
+    _token: str | None = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "url", f"http://{self.host}:{self.port}")
+    
+    @property
+    def token(self) -> str:
         """
         Load InfluxDB token from environment variable or token.json file.
         
+        Resolved lazily on first access (normally at connect time) and
+        cached, so importing the config does no file I/O.
+        
         Returns:
             The authentication token
-            
+        
         Raises:
             ValueError: If token cannot be found
         """
+        if self._token is None:
+            object.__setattr__(self, "_token", self._load_token())
+        return self._token
+    
+    @staticmethod
+    def _load_token() -> str:
+        """Look up the token: INFLUX_TOKEN env var first, then token.json."""
         # Try environment variable first
-        token = os.getenv("INFLUX_TOKEN")
+        token = os.environ.get("INFLUX_TOKEN")
         if token:
             logger.info("Using InfluxDB token from environment variable")
             return token
@@ -79,17 +102,16 @@ class InfluxDBConfig:
         
         if token_file.exists():
             try:
-                with open(token_file, 'r') as f:
-                    token_data = json.load(f)
-                    token = token_data.get("token")
-                    
-                    if token:
-                        logger.info(f"Loaded InfluxDB token from {token_file}")
-                        return token
-                    else:
-                        raise ValueError("Token field not found in token.json")
-                        
-            except json.JSONDecodeError as e:
+                token_data = orjson.loads(token_file.read_bytes())
+                token = token_data.get("token")
+
+                if token:
+                    logger.info(f"Loaded InfluxDB token from {token_file}")
+                    return token
+                else:
+                    raise ValueError("Token field not found in token.json")
+
+            except orjson.JSONDecodeError as e:
                 raise ValueError(f"Invalid JSON in {token_file}: {e}")
             except Exception as e:
                 raise ValueError(f"Failed to read token file: {e}")
@@ -101,8 +123,9 @@ class InfluxDBConfig:
         )
     
     def __repr__(self) -> str:
-        """String representation (hides token)."""
-        token_preview = f"{self.token[:10]}..." if self.token else "None"
+        """String representation (hides token, does not force loading it)."""
+        token = self._token
+        token_preview = f"{token[:10]}..." if token else "<not loaded>"
         return (
             f"InfluxDBConfig(url='{self.url}', database='{self.database}', "
             f"org='{self.org}', measurement='{self.measurement}', "
@@ -110,16 +133,16 @@ class InfluxDBConfig:
         )
 
 
+@dataclass(frozen=True, slots=True)
 class AppConfig:
     """Application-wide configuration."""
     
-    def __init__(self):
-        self.mqtt = MQTTConfig()
-        self.influxdb = InfluxDBConfig()
-        self.log_level: str = os.getenv("LOG_LEVEL", "INFO")
-        
-        # Timezone for timestamps
-        self.timezone: str = os.getenv("TZ", "America/Sao_Paulo")
+    mqtt: MQTTConfig = field(default_factory=MQTTConfig)
+    influxdb: InfluxDBConfig = field(default_factory=InfluxDBConfig)
+    log_level: str = field(default_factory=lambda: os.environ.get("LOG_LEVEL", "INFO"))
+    
+    # Timezone for timestamps
+    timezone: str = field(default_factory=lambda: os.environ.get("TZ", "America/Sao_Paulo"))
     
     def __repr__(self) -> str:
         return (
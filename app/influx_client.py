@@ -3,32 +3,243 @@ InfluxDB 3 Core client for storing and querying weather station data.
 Provides a clean wrapper around the influxdb3-python client.
 """
 import logging
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
 
-from influxdb_client_3 import InfluxDBClient3, Point
+import orjson
+import pyarrow as pa
+from influxdb_client_3 import InfluxDBClient3, WritePrecision, write_client_options
 from influxdb_client_3.write_client.client.write_api import WriteOptions
 
-from app.models import WeatherSample
+from app.models import WeatherSample, TEMPERATURE_RANGE_C, HUMIDITY_RANGE_PCT, to_float, to_int
 from app.config import InfluxDBConfig
 
 logger = logging.getLogger(__name__)
 
+# MQTT JSON key -> InfluxDB field name, used by the raw-JSON write path
+_REQUIRED_JSON_FIELDS = (
+    ("temperature", "temperature_c"),
+    ("humidity", "humidity_pct"),
+    ("co2", "air_quality_co2_ppm"),
+    ("flammable_gas", "flammable_gas_ppm"),
+    ("toxic_gas", "toxic_gas_ppm"),
+    ("uv_index", "uv_index"),
+    ("battery", "battery_voltage"),
+)
+_OPTIONAL_JSON_FLOAT_FIELDS = (
+    ("latitude", "gps_latitude"),
+    ("longitude", "gps_longitude"),
+    ("altitude", "gps_altitude_m"),
+)
+_OPTIONAL_JSON_INT_FIELDS = (
+    ("satellites", "gps_satellites"),
+    ("fix_quality", "gps_fix_quality"),
+)
+
+# Keep-alive HTTP connections the write pool holds at most (the batching
+# writer plus a few direct writers)
+HTTP_POOL_MAXSIZE = 16
+
+# SQL templates; the measurement identifier is filled in once per client and
+# values are passed as query parameters
+_Q_RECENT = 'SELECT * FROM "{measurement}" ORDER BY time DESC'
+_Q_RANGE = (
+    'SELECT * FROM "{measurement}" '
+    'WHERE time >= $start AND time <= $end '
+    'ORDER BY time ASC'
+)
+_Q_COUNT = 'SELECT COUNT(*) as count FROM "{measurement}"'
+
+# Tail shared by the generated formatters. Fields are appended as
+# ",name=value" only when finite ("v - v == 0" is False for NaN and +/-inf),
+# so the leading comma is dropped and an all-non-finite record is rejected.
+_LP_EMPTY_CHECK = [
+    "    if not f:",
+    '        raise ValueError("No finite field values to write")',
+]
+
+
+def _compile_lp_formatter(measurement: str) -> Callable[[WeatherSample], str]:
+    """
+    Generate a line protocol formatter specialized to the WeatherSample schema.
+    
+    Structure of each record:
+    - Measurement: weather_data (or configured name)
+    - Tags: (optional, for now we use none, but could add location, device_id, etc.)
+    - Fields: all sensor readings; GPS fields only when not None,
+      integers with the "i" suffix. Non-finite values (NaN, +/-inf) are
+      skipped, as line protocol cannot represent them and one such value
+      would make the server reject the whole batch.
+    - Timestamp: server-side reception time (sample.timestamp_ns)
+    
+    The field set is fixed, so the function body is generated once as
+    straight-line code (one conditional append per field) and compiled
+    with exec, avoiding per-field loops and lookups.
+    
+    Args:
+        measurement: Measurement name, already escaped for line protocol
+        
+    Returns:
+        Function converting a WeatherSample to a line protocol string
+        (raises ValueError if no field has a finite value)
+    """
+    lines = ['    f = ""']
+    for _, field in _REQUIRED_JSON_FIELDS:
+        lines += [
+            f"    v = s.{field}",
+            "    if v - v == 0:",
+            f'        f += f",{field}={{v}}"',
+        ]
+    for _, field in _OPTIONAL_JSON_FLOAT_FIELDS:
+        lines += [
+            f"    v = s.{field}",
+            "    if v is not None and v - v == 0:",
+            f'        f += f",{field}={{v}}"',
+        ]
+    for _, field in _OPTIONAL_JSON_INT_FIELDS:
+        lines += [
+            f"    v = s.{field}",
+            "    if v is not None:",
+            "        if v.__class__ is not int:",
+            "            v = _i(v)",
+            f'        f += f",{field}={{v}}i"',
+        ]
+    lines += _LP_EMPTY_CHECK + ['    return f"{_m} {f[1:]} {s.timestamp_ns}"']
+    
+    source = "def _fmt_lp(s, _m=_m, _i=int):\n" + "\n".join(lines) + "\n"
+    namespace = {"_m": measurement}
+    exec(compile(source, "<influx_lp_formatter>", "exec"), namespace)
+    return namespace["_fmt_lp"]
+
+
+def _compile_json_to_lp(measurement: str) -> Callable[[dict, int], str]:
+    """
+    Generate a decoder from MQTT JSON dictionaries straight to line protocol.
+    
+    Applies the same range checks as WeatherSample and the same value
+    conversions as the MQTT payload decoders (to_float/to_int, called only
+    when a value is not already a float/int), and skips non-finite values
+    like _compile_lp_formatter. The known schema is unrolled the same way
+    into straight-line code (direct key lookups) compiled once with exec.
+    
+    The generated function takes the parsed JSON dictionary and the
+    server-side reception time (epoch nanoseconds), and raises KeyError if
+    required fields are missing, or TypeError/ValueError if a value cannot
+    be converted or data validation fails.
+    
+    Args:
+        measurement: Measurement name, already escaped for line protocol
+        
+    Returns:
+        Function converting (data, timestamp_ns) to a line protocol string
+    """
+    lines = []
+    for key, field in _REQUIRED_JSON_FIELDS:
+        lines += [
+            f'    {field} = data["{key}"]',
+            f"    if {field}.__class__ is not float:",
+            f"        {field} = _f({field})",
+        ]
+    lines += [
+        "    if not (_temp_min <= temperature_c <= _temp_max):",
+        '        raise ValueError(f"Temp out of range: {temperature_c}")',
+        "    if not (_humidity_min <= humidity_pct <= _humidity_max):",
+        '        raise ValueError(f"Humidity out of range: {humidity_pct}")',
+        '    f = ""',
+    ]
+    for _, field in _REQUIRED_JSON_FIELDS:
+        lines += [
+            f"    if {field} - {field} == 0:",
+            f'        f += f",{field}={{{field}}}"',
+        ]
+    
+    # Optional GPS fields (may be null or missing)
+    lines.append("    g = data.get")
+    for key, field in _OPTIONAL_JSON_FLOAT_FIELDS:
+        lines += [
+            f'    v = g("{key}")',
+            "    if v is not None:",
+            "        if v.__class__ is not float:",
+            "            v = _f(v)",
+            "        if v - v == 0:",
+            f'            f += f",{field}={{v}}"',
+        ]
+    for key, field in _OPTIONAL_JSON_INT_FIELDS:
+        lines += [
+            f'    v = g("{key}")',
+            "    if v is not None:",
+            f'        f += f",{field}={{_i(v)}}i"',
+        ]
+    lines += _LP_EMPTY_CHECK + ['    return f"{_m} {f[1:]} {timestamp_ns}"']
+    
+    source = (
+        "def _json_to_lp(data, timestamp_ns, _m=_m, _f=to_float, _i=to_int):\n"
+        + "\n".join(lines) + "\n"
+    )
+    namespace = {
+        "_m": measurement,
+        "to_float": to_float,
+        "to_int": to_int,
+        "_temp_min": TEMPERATURE_RANGE_C[0],
+        "_temp_max": TEMPERATURE_RANGE_C[1],
+        "_humidity_min": HUMIDITY_RANGE_PCT[0],
+        "_humidity_max": HUMIDITY_RANGE_PCT[1],
+    }
+    exec(compile(source, "<influx_json_to_lp>", "exec"), namespace)
+    return namespace["_json_to_lp"]
+
+
 class InfluxClient:
     """
     Thin wrapper around InfluxDB 3 Core client for weather data storage.
-    Handles connection, point construction, and basic queries.
+    Handles connection, line protocol serialization, and basic queries.
     """
     
-    def __init__(self, config: InfluxDBConfig):
+    def __init__(
+        self,
+        config: InfluxDBConfig,
+        on_points_written: Optional[Callable[[int], None]] = None,
+        on_points_failed: Optional[Callable[[int, Exception], None]] = None,
+    ):
         """
         Initialize the InfluxDB client.
         
+        Writes are batched in the background, so their outcome is only
+        known later; it is reported through the optional callbacks, which
+        run on the batching writer's thread.
+        
         Args:
             config: InfluxDB connection configuration
+            on_points_written: Callback invoked with the number of points in
+                each batch the server accepted
+            on_points_failed: Callback invoked with the number of points in
+                each batch that failed (after retries) and the exception
         """
         self.config = config
         self._client: Optional[InfluxDBClient3] = None
+        self.on_points_written = on_points_written
+        self.on_points_failed = on_points_failed
+        
+        # Measurement name escaped once for line protocol
+        self._measurement: str = (
+            config.measurement.replace(",", r"\,").replace(" ", r"\ ")
+        )
+        
+        # Line protocol formatter specialized to the WeatherSample schema
+        self._fmt_lp: Callable[[WeatherSample], str] = _compile_lp_formatter(
+            self._measurement
+        )
+        
+        # Raw-JSON decoder used by write_raw_json, specialized the same way
+        self._json_to_lp: Callable[[dict, int], str] = _compile_json_to_lp(
+            self._measurement
+        )
+        
+        # Query strings built once (identifier quoted for SQL)
+        table = config.measurement.replace('"', '""')
+        self._q_recent: str = _Q_RECENT.format(measurement=table)
+        self._q_range: str = _Q_RANGE.format(measurement=table)
+        self._q_count: str = _Q_COUNT.format(measurement=table)
         
         logger.info(f"Initializing InfluxDB client for {config.url}")
     
@@ -39,12 +250,30 @@ class InfluxClient:
         Raises:
             ConnectionError: If connection fails
         """
+        # Let the underlying client batch writes as well; failed batches
+        # are retried and finally reported through the error callback.
+        write_options = WriteOptions(
+            batch_size=500,
+            flush_interval=1_000,
+            jitter_interval=500,
+            retry_interval=5_000,
+        )
+        
         try:
             self._client = InfluxDBClient3(
                 host=self.config.url,
                 token=self.config.token,
                 database=self.config.database,
                 org=self.config.org,
+                # Compress write payloads; the HTTP connection pool is
+                # kept alive and reused for the client's lifetime
+                enable_gzip=True,
+                connection_pool_maxsize=HTTP_POOL_MAXSIZE,
+                write_client_options=write_client_options(
+                    write_options=write_options,
+                    success_callback=self._on_write_success,
+                    error_callback=self._on_write_error,
+                ),
             )
             
             logger.info(
@@ -56,8 +285,18 @@ class InfluxClient:
             logger.error(f"Failed to connect to InfluxDB: {e}")
             raise ConnectionError(f"InfluxDB connection failed: {e}") from e
     
+    def flush(self) -> None:
+        """
+        Send all buffered writes now and wait until they have completed.
+        
+        The write callbacks have run for every batch by the time this
+        returns; the client stays usable afterwards.
+        """
+        if self._client:
+            self._client.flush()
+    
     def close(self) -> None:
-        """Close the InfluxDB client connection."""
+        """Close the InfluxDB client connection (flushing buffered writes)."""
         if self._client:
             self._client.close()
             logger.info("InfluxDB connection closed")
@@ -66,42 +305,75 @@ class InfluxClient:
         """Check if client is connected."""
         return self._client is not None
     
+    def http_connections_opened(self) -> int:
+        """
+        Count the TCP connections the write path has opened so far.
+        
+        Test-only diagnostic: it reads the private urllib3 pools of the
+        underlying influxdb3-python client, which may change between
+        versions. Never use it in application code.
+        
+        Returns:
+            Connections opened across all write pools (0 if not connected)
+        """
+        if self._client is None:
+            return 0
+        pools = self._client.rest_client.pool_manager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+    
+    @staticmethod
+    def _count_points(data: bytes) -> int:
+        """Number of line protocol records in a batch body."""
+        return data.count(b"\n") + 1
+    
+    def _on_write_success(self, conf, data: bytes) -> None:
+        """Callback invoked by the batching writer when a batch is accepted."""
+        count = self._count_points(data)
+        logger.debug("Wrote %d points to InfluxDB", count)
+        if self.on_points_written is not None:
+            self.on_points_written(count)
+    
+    def _on_write_error(self, conf, data: bytes, exception: Exception) -> None:
+        """Callback invoked by the batching writer when a batch fails."""
+        count = self._count_points(data)
+        logger.error("Batched write of %d points to InfluxDB failed: %s", count, exception)
+        if self.on_points_failed is not None:
+            self.on_points_failed(count, exception)
+    
     # -------------------------------------------------------------------------
     # Write Operations
     # -------------------------------------------------------------------------
     
     def write_sample(self, sample: WeatherSample) -> None:
         """
-        Write a single WeatherSample to InfluxDB.
+        Queue a single WeatherSample for writing to InfluxDB.
+        
+        The point is sent with the next batch; the outcome is reported
+        through on_points_written / on_points_failed.
         
         Args:
             sample: The weather sample to write
             
         Raises:
             RuntimeError: If client is not connected
-            Exception: If write operation fails
         """
         if not self._client:
             raise RuntimeError("InfluxDB client is not connected. Call connect() first.")
         
-        try:
-            # Convert WeatherSample to InfluxDB Point
-            point = self._sample_to_point(sample)
-            
-            # Write to database
-            self._client.write(record=point)
-            
-            logger.debug(f"Wrote sample to InfluxDB: {sample}")
-            
-        except Exception as e:
-            logger.error(f"Failed to write sample to InfluxDB: {e}")
-            raise
+        # Convert WeatherSample to a line protocol record and queue it
+        self._client.write(record=self._fmt_lp(sample), write_precision=WritePrecision.NS)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Queued sample for InfluxDB: %s", sample)
     
     def write_samples_batch(self, samples: List[WeatherSample]) -> None:
         """
-        Write multiple WeatherSamples in a batch operation.
+        Queue multiple WeatherSamples for writing in a batch operation.
         More efficient than individual writes for bulk data.
         
+        The outcome is reported through on_points_written /
+        on_points_failed once the batching writer has sent the points.
+        
         Args:
             samples: List of weather samples to write
             
@@ -115,67 +387,71 @@ class InfluxClient:
             logger.warning("write_samples_batch called with empty list")
             return
         
-        try:
-            points = [self._sample_to_point(s) for s in samples]
-            self._client.write(record=points)
-            
-            logger.info(f"Wrote {len(samples)} samples to InfluxDB")
-            
-        except Exception as e:
-            logger.error(f"Failed to write batch to InfluxDB: {e}")
-            raise
+        payload = "\n".join(map(self._fmt_lp, samples))
+        self._client.write(record=payload, write_precision=WritePrecision.NS)
+        
+        logger.debug("Queued %d samples for InfluxDB", len(samples))
     
-    def _sample_to_point(self, sample: WeatherSample) -> Point:
+    def write_raw_json(self, payload: bytes, timestamp_ns: int) -> None:
         """
-        Convert a WeatherSample to an InfluxDB Point.
+        Queue a raw MQTT JSON payload for writing to InfluxDB.
         
-        Structure:
-        - Measurement: weather_data (or configured name)
-        - Tags: (optional, for now we use none, but could add location, device_id, etc.)
-        - Fields: all sensor readings
-        - Timestamp: server-side reception time
+        Fast path that skips the WeatherSample round-trip: the payload is
+        decoded once and formatted directly as line protocol. Like the
+        other writes, the outcome is reported through the write callbacks.
         
         Args:
-            sample: The weather sample
+            payload: Raw JSON bytes as received over MQTT
+            timestamp_ns: Server-side reception time (epoch nanoseconds)
             
-        Returns:
-            InfluxDB Point ready to write
+        Raises:
+            RuntimeError: If client is not connected
+            KeyError: If required fields are missing
+            ValueError: If the payload is invalid or out of range
         """
-        point = Point(self.config.measurement)
-        
-        # Timestamp
-        point.time(sample.timestamp)
-        
-        # Tags (optional - useful for filtering/grouping)
-        # Example: point.tag("location", "outdoor")
-        # Example: point.tag("device_id", "esp32_001")
+        if not self._client:
+            raise RuntimeError("InfluxDB client is not connected. Call connect() first.")
         
-        # Fields - all sensor data
-        point.field("temperature_c", sample.temperature_c)
-        point.field("humidity_pct", sample.humidity_pct)
-        point.field("air_quality_co2_ppm", sample.air_quality_co2_ppm)
-        point.field("flammable_gas_ppm", sample.flammable_gas_ppm)
-        point.field("toxic_gas_ppm", sample.toxic_gas_ppm)
-        point.field("uv_index", sample.uv_index)
-        point.field("battery_voltage", sample.battery_voltage)
+        line = self._json_to_lp(orjson.loads(payload), timestamp_ns)
+        self._client.write(record=line, write_precision=WritePrecision.NS)
+    
+    def write_raw_json_batch(self, messages: List[Tuple[bytes, int]]) -> int:
+        """
+        Queue several raw MQTT JSON payloads for writing in one call.
         
-        # GPS fields (only if available)
-        if sample.gps_latitude is not None:
-            point.field("gps_latitude", sample.gps_latitude)
+        Batch form of write_raw_json. Payloads that fail to parse or
+        validate are logged and skipped, so one bad message does not hold
+        back the rest.
         
-        if sample.gps_longitude is not None:
-            point.field("gps_longitude", sample.gps_longitude)
+        Args:
+            messages: (raw JSON bytes, reception time in epoch ns) pairs
+            
+        Returns:
+            Number of payloads rejected as invalid
+            
+        Raises:
+            RuntimeError: If client is not connected
+        """
+        if not self._client:
+            raise RuntimeError("InfluxDB client is not connected. Call connect() first.")
         
-        if sample.gps_altitude_m is not None:
-            point.field("gps_altitude_m", sample.gps_altitude_m)
+        to_lp = self._json_to_lp
+        loads = orjson.loads
+        lines = []
+        rejected = 0
         
-        if sample.gps_satellites is not None:
-            point.field("gps_satellites", sample.gps_satellites)
+        for payload, timestamp_ns in messages:
+            try:
+                lines.append(to_lp(loads(payload), timestamp_ns))
+            except (KeyError, TypeError, ValueError) as e:
+                rejected += 1
+                logger.error("Failed to parse weather sample: %r", e)
+                logger.debug("Payload: %r", payload)
         
-        if sample.gps_fix_quality is not None:
-            point.field("gps_fix_quality", sample.gps_fix_quality)
+        if lines:
+            self._client.write(record="\n".join(lines), write_precision=WritePrecision.NS)
         
-        return point
+        return rejected
     
     # -------------------------------------------------------------------------
     # Query Operations
@@ -197,12 +473,9 @@ class InfluxClient:
         if not self._client:
             raise RuntimeError("InfluxDB client is not connected. Call connect() first.")
         
-        query = f"""
-            SELECT *
-            FROM "{self.config.measurement}"
-            ORDER BY time DESC
-            LIMIT {limit}
-        """
+        # LIMIT is coerced to int rather than bound, so no untrusted text
+        # ever reaches the SQL string
+        query = f"{self._q_recent} LIMIT {int(limit)}"
         
         try:
             result = self._client.query(query=query)
@@ -210,13 +483,44 @@ class InfluxClient:
             # Convert PyArrow table to list of dicts
             data = self._pyarrow_to_list(result)
             
-            logger.debug(f"Queried {len(data)} recent samples")
+            logger.debug("Queried %d recent samples", len(data))
             return data
             
         except Exception as e:
             logger.error(f"Query failed: {e}")
             raise
     
+    def query_recent_table(self, limit: int = 100) -> pa.Table:
+        """
+        Query the most recent weather samples as a PyArrow Table.
+        
+        Same as query_recent_samples(), but skips the conversion to
+        Python dictionaries.
+        
+        Args:
+            limit: Maximum number of samples to return
+            
+        Returns:
+            PyArrow Table with one row per sample
+            
+        Raises:
+            RuntimeError: If client is not connected
+        """
+        if not self._client:
+            raise RuntimeError("InfluxDB client is not connected. Call connect() first.")
+        
+        # LIMIT is coerced to int rather than bound, so no untrusted text
+        # ever reaches the SQL string
+        query = f"{self._q_recent} LIMIT {int(limit)}"
+        
+        try:
+            result = self._client.query(query=query)
+            return self._pyarrow_raw(result)
+            
+        except Exception as e:
+            logger.error(f"Query failed: {e}")
+            raise
+    
     def query_time_range(
         self,
         start: datetime,
@@ -242,20 +546,16 @@ class InfluxClient:
         start_str = start.isoformat()
         end_str = end.isoformat()
         
-        query = f"""
-            SELECT *
-            FROM "{self.config.measurement}"
-            WHERE time >= '{start_str}' AND time <= '{end_str}'
-            ORDER BY time ASC
-        """
-        
         try:
-            result = self._client.query(query=query)
+            result = self._client.query(
+                query=self._q_range,
+                query_parameters={"start": start_str, "end": end_str},
+            )
             
             # Convert PyArrow table to list of dicts
             data = self._pyarrow_to_list(result)
             
-            logger.debug(f"Queried {len(data)} samples in time range")
+            logger.debug("Queried %d samples in time range", len(data))
             return data
             
         except Exception as e:
@@ -282,13 +582,8 @@ class InfluxClient:
         if not self._client:
             raise RuntimeError("InfluxDB client is not connected. Call connect() first.")
         
-        query = f"""
-            SELECT COUNT(*) as count
-            FROM "{self.config.measurement}"
-        """
-        
         try:
-            result = self._client.query(query=query)
+            result = self._client.query(query=self._q_count)
             
             # Convert PyArrow result to list of dicts
             data = self._pyarrow_to_list(result)
@@ -314,6 +609,8 @@ class InfluxClient:
         
         The influxdb3-python client returns PyArrow tables, which need
         to be converted to native Python types for easier consumption.
+        ``to_pylist()`` does this in a single C-level pass, without an
+        intermediate pandas DataFrame.
         
         Args:
             table: PyArrow Table or RecordBatch from query result
@@ -321,33 +618,44 @@ class InfluxClient:
         Returns:
             List of dictionaries, one per row
         """
+        if hasattr(table, 'to_pylist'):
+            return table.to_pylist()
+        
+        # Fallback: manual conversion
         try:
-            # Convert to pandas DataFrame first (easiest conversion)
-            df = table.to_pandas()
+            result = []
+            
+            # Get column names
+            columns = table.column_names if hasattr(table, 'column_names') else table.schema.names
+            
+            # Iterate over rows
+            for i in range(len(table)):
+                row_dict = {}
+                for col in columns:
+                    value = table[col][i].as_py()  # Convert to Python object
+                    row_dict[col] = value
+                result.append(row_dict)
             
-            # Convert DataFrame to list of dicts
-            return df.to_dict('records')
+            return result
             
         except Exception as e:
             logger.error(f"Failed to convert PyArrow table: {e}")
+            raise
+    
+    @staticmethod
+    def _pyarrow_raw(table) -> pa.Table:
+        """
+        Return a query result as a PyArrow Table without converting rows.
+        
+        For callers that consume Arrow directly (e.g. dashboards or
+        vectorized analysis), this avoids any per-row Python objects.
+        
+        Args:
+            table: PyArrow Table or RecordBatch from query result
             
-            # Fallback: manual conversion
-            try:
-                result = []
-                
-                # Get column names
-                columns = table.column_names if hasattr(table, 'column_names') else table.schema.names
-                
-                # Iterate over rows
-                for i in range(len(table)):
-                    row_dict = {}
-                    for col in columns:
-                        value = table[col][i].as_py()  # Convert to Python object
-                        row_dict[col] = value
-                    result.append(row_dict)
-                
-                return result
-                
-            except Exception as e2:
-                logger.error(f"Fallback conversion also failed: {e2}")
-                raise
+        Returns:
+            PyArrow Table
+        """
+        if isinstance(table, pa.RecordBatch):
+            return pa.Table.from_batches([table])
+        return table
@@ -6,8 +6,10 @@ Subscribes to weather sensor data over MQTT and stores it in InfluxDB.
 """
 
 import logging
+import queue
 import signal
 import sys
+import threading
 import time
 from typing import Optional
 
@@ -23,7 +25,8 @@ from app.mqtt_client import MQTTClient
 
 logging.basicConfig(
     level=getattr(logging, config.log_level.upper(), logging.INFO),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    format="{asctime} - {name} - {levelname} - {message}",
+    style="{",
     handlers=[
         logging.StreamHandler(sys.stdout),
         # Optionally add file handler:
@@ -33,6 +36,26 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Banner blocks are pre-joined so each one is emitted as a single log record
+_RULE = "=" * 70
+_THIN_RULE = "-" * 70
+_STARTING_BANNER = f"{_RULE}\nWeather Station Application Starting\n{_RULE}"
+_SETUP_BANNER = (
+    f"{_RULE}\n"
+    "Setup complete! Waiting for sensor data...\n"
+    "Subscribed to topic: %s\n"
+    "Press Ctrl+C to stop\n"
+    f"{_RULE}"
+)
+_SHUTDOWN_BANNER = f"{_RULE}\nShutting down Weather Station Application\n{_RULE}"
+_GOODBYE_BANNER = f"Shutdown complete. Goodbye!\n{_RULE}"
+_STATISTICS_BLOCK = (
+    f"{_THIN_RULE}\n"
+    "Statistics | Uptime: %s\n"
+    "  Received: %d | Written: %d | Failed: %d | Success: %.1f%%\n"
+    f"{_THIN_RULE}"
+)
+
 
 # ---------------------------------------------------------------------------
 # Main Application
@@ -45,31 +68,63 @@ class WeatherStationApp:
     Responsibilities:
     - Initialize and manage MQTT and InfluxDB clients.
     - Receive WeatherSample objects via MQTT callback.
-    - Persist samples to InfluxDB.
+    - Queue samples and persist them to InfluxDB in batches from a
+      dedicated writer thread.
     - Track and report basic statistics.
     """
 
     def __init__(self) -> None:
         """Initialize the application but do not connect yet."""
-        logger.info("=" * 70)
-        logger.info("Weather Station Application Starting")
-        logger.info("=" * 70)
+        logger.info(_STARTING_BANNER)
 
         # Display effective configuration
         logger.info("Configuration: %s", config)
 
-        # Statistics tracking
+        # Statistics tracking. Received is only updated on the MQTT thread;
+        # written/failed are also updated from the writer thread and the
+        # Influx batching writer's callbacks, hence the lock.
         self.samples_received: int = 0
         self.samples_written: int = 0
         self.samples_failed: int = 0
         self.start_time: float = time.time()
+        self._stats_lock = threading.Lock()
+
+        # Write queue: the MQTT thread only enqueues samples (parsed
+        # WeatherSamples or raw (payload, timestamp_ns) pairs), the writer
+        # thread drains them to InfluxDB in batches (created in setup).
+        # The queue is bounded so a stalled InfluxDB cannot exhaust memory.
+        self._queue: Optional[queue.Queue] = None
+        self._writer_thread: Optional[threading.Thread] = None
+        self._queue_size: int = 10_000
+        self._flush_size: int = 100
+        self._flush_interval: float = 0.5  # seconds
 
         # Clients (created in setup)
         self.influx_client: Optional[InfluxClient] = None
         self.mqtt_client: Optional[MQTTClient] = None
 
-        # Shutdown flag
-        self.shutdown_requested: bool = False
+        # Shutdown signal: run() blocks on it until it is set
+        self._shutdown_evt = threading.Event()
+
+        # Set (under _stats_lock) by the first shutdown() call; both run()
+        # and main() call shutdown(), the cleanup must only run once
+        self._shut_down: bool = False
+
+    @property
+    def shutdown_requested(self) -> bool:
+        """Whether shutdown has been requested (backed by a threading.Event)."""
+        return self._shutdown_evt.is_set()
+
+    @shutdown_requested.setter
+    def shutdown_requested(self, value: bool) -> None:
+        if value:
+            self._shutdown_evt.set()
+        else:
+            self._shutdown_evt.clear()
+
+    def request_shutdown(self) -> None:
+        """Ask run() to return and shut down; safe to call from any thread."""
+        self._shutdown_evt.set()
 
     # ------------------------------------------------------------------ #
     # Setup & lifecycle
@@ -86,7 +141,11 @@ class WeatherStationApp:
 
         # 1. Connect to InfluxDB first
         logger.info("Connecting to InfluxDB...")
-        self.influx_client = InfluxClient(config.influxdb)
+        self.influx_client = InfluxClient(
+            config.influxdb,
+            on_points_written=self._on_points_written,
+            on_points_failed=self._on_points_failed,
+        )
         self.influx_client.connect()
 
         # Optional: verify database accessibility
@@ -96,22 +155,28 @@ class WeatherStationApp:
         except Exception as exc:  # noqa: BLE001
             logger.warning("Could not query initial count from InfluxDB: %s", exc)
 
-        # 2. Set up MQTT client with callback
+        # 2. Start the writer thread that persists queued samples
+        self._queue = queue.Queue(maxsize=self._queue_size)
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop,
+            name="influx-writer",
+            daemon=True,
+        )
+        self._writer_thread.start()
+
+        # 3. Set up MQTT client with callback
         logger.info("Setting up MQTT client...")
         self.mqtt_client = MQTTClient(
             config=config.mqtt,
             on_sample_received=self._on_sample_received,
+            on_raw_message=self._on_raw_message,
         )
 
-        # 3. Connect to MQTT broker and start loop
+        # 4. Connect to MQTT broker and start loop
         self.mqtt_client.connect()
         self.mqtt_client.start()
 
-        logger.info("=" * 70)
-        logger.info("Setup complete! Waiting for sensor data...")
-        logger.info("Subscribed to topic: %s", config.mqtt.topic)
-        logger.info("Press Ctrl+C to stop")
-        logger.info("=" * 70)
+        logger.info(_SETUP_BANNER, config.mqtt.topic)
 
     # ------------------------------------------------------------------ #
     # MQTT callback and stats
@@ -121,43 +186,165 @@ class WeatherStationApp:
         """
         Callback invoked when a WeatherSample is received from MQTT.
 
-        Writes the sample to InfluxDB and updates statistics.
+        Only enqueues the sample; the writer thread persists it, so the
+        MQTT network thread never blocks on InfluxDB.
 
         Args:
             sample: Parsed and validated weather sample.
         """
         self.samples_received += 1
 
+        if not self._enqueue(sample):
+            logger.debug("Dropped sample: %s", sample)
+            return
+
+        # Log a concise summary of the sample
+        logger.info(
+            "[%d] %s | T: %.1f°C | H: %.1f%% | CO2: %.0f ppm | Battery: %.2fV",
+            self.samples_received,
+            sample.timestamp.time().isoformat("seconds"),
+            sample.temperature_c,
+            sample.humidity_pct,
+            sample.air_quality_co2_ppm,
+            sample.battery_voltage,
+        )
+
+        # Periodically show aggregated statistics
+        if self.samples_received % 10 == 0:
+            self._show_statistics()
+
+    def _on_raw_message(self, payload: bytes, timestamp_ns: int) -> None:
+        """
+        Fast-path callback invoked with a raw MQTT payload.
+
+        Enqueues the payload as-is, skipping WeatherSample construction;
+        the writer thread formats it straight to line protocol. Like
+        parsed samples, it goes through the bounded queue, so the MQTT
+        network thread never blocks on InfluxDB.
+
+        Args:
+            payload: Raw JSON bytes from the MQTT message.
+            timestamp_ns: Server-side reception time (epoch nanoseconds).
+        """
+        self.samples_received += 1
+        self._enqueue((payload, timestamp_ns))
+
+        # Periodically show aggregated statistics
+        if self.samples_received % 10 == 0:
+            self._show_statistics()
+
+    def _enqueue(self, item) -> bool:
+        """
+        Put a sample or raw message on the write queue without blocking.
+
+        Returns:
+            True if queued, False if it was dropped (counted as failed).
+        """
+        if self._queue is None:
+            # Defensive guard: should never happen if setup() succeeded.
+            self._on_points_failed(1, None)
+            logger.error("Write queue not initialized; cannot write sample.")
+            return False
+
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._on_points_failed(1, None)
+            logger.warning("Write queue full (%d samples); dropping sample.", self._queue_size)
+            return False
+
+        return True
+
+    def _writer_loop(self) -> None:
+        """
+        Writer thread: drain the queue and write samples in batches.
+
+        Blocks until a sample arrives, then collects up to ``_flush_size``
+        samples or waits at most ``_flush_interval`` seconds before writing
+        them. A ``None`` item signals shutdown after the pending batch.
+        """
+        if self._queue is None:
+            return
+        get = self._queue.get
+
+        while True:
+            sample = get()
+            if sample is None:
+                return
+
+            batch = [sample]
+            deadline = time.monotonic() + self._flush_interval
+            stop = False
+
+            while len(batch) < self._flush_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    sample = get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if sample is None:
+                    stop = True
+                    break
+                batch.append(sample)
+
+            self._write_batch(batch)
+
+            if stop:
+                return
+
+    def _write_batch(self, batch: list) -> None:
+        """
+        Hand a batch of queued items to the InfluxDB client.
+
+        WeatherSamples and raw (payload, timestamp_ns) messages are
+        written with one call each. Only invalid raw payloads and failures
+        to queue the batch are counted here; whether the points were
+        actually written is reported asynchronously through
+        _on_points_written / _on_points_failed.
+        """
         if not self.influx_client:
             # Defensive guard: should never happen if setup() succeeded.
-            self.samples_failed += 1
-            logger.error("Influx client not initialized; cannot write sample.")
-            logger.debug("Orphan sample: %s", sample)
+            self._on_points_failed(len(batch), None)
+            logger.error("Influx client not initialized; cannot write %d samples.", len(batch))
             return
 
-        try:
-            self.influx_client.write_sample(sample)
-            self.samples_written += 1
-
-            # Log a concise summary of the sample
-            logger.info(
-                "[%d] %s | T: %.1f°C | H: %.1f%% | CO2: %.0f ppm | Battery: %.2fV",
-                self.samples_received,
-                sample.timestamp.strftime("%H:%M:%S"),
-                sample.temperature_c,
-                sample.humidity_pct,
-                sample.air_quality_co2_ppm,
-                sample.battery_voltage,
-            )
-
-            # Periodically show aggregated statistics
-            if self.samples_received % 10 == 0:
-                self._show_statistics()
+        samples = []
+        raw = []
+        for item in batch:
+            (raw if type(item) is tuple else samples).append(item)
 
-        except Exception as exc:  # noqa: BLE001
-            self.samples_failed += 1
-            logger.error("Failed to write sample to InfluxDB: %s", exc)
-            logger.debug("Failed sample: %s", sample)
+        if samples:
+            try:
+                self.influx_client.write_samples_batch(samples)
+            except Exception as exc:  # noqa: BLE001
+                self._on_points_failed(len(samples), exc)
+                logger.error("Failed to write %d samples to InfluxDB: %s", len(samples), exc)
+
+        if raw:
+            try:
+                rejected = self.influx_client.write_raw_json_batch(raw)
+            except Exception as exc:  # noqa: BLE001
+                self._on_points_failed(len(raw), exc)
+                logger.error("Failed to write %d samples to InfluxDB: %s", len(raw), exc)
+            else:
+                if rejected:
+                    self._on_points_failed(rejected, None)
+
+    def _on_points_written(self, count: int) -> None:
+        """InfluxDB callback: a batch of ``count`` points was accepted."""
+        with self._stats_lock:
+            self.samples_written += count
+
+    def _on_points_failed(self, count: int, exc: Optional[Exception]) -> None:
+        """
+        InfluxDB callback: a batch of ``count`` points could not be written.
+
+        Also used for samples dropped or rejected before reaching InfluxDB.
+        """
+        with self._stats_lock:
+            self.samples_failed += count
 
     def _show_statistics(self) -> None:
         """Display application statistics in the logs."""
@@ -170,16 +357,14 @@ class WeatherStationApp:
             else 0.0
         )
 
-        logger.info("-" * 70)
-        logger.info("Statistics | Uptime: %s", uptime_str)
         logger.info(
-            "  Received: %d | Written: %d | Failed: %d | Success: %.1f%%",
+            _STATISTICS_BLOCK,
+            uptime_str,
             self.samples_received,
             self.samples_written,
             self.samples_failed,
             success_rate,
         )
-        logger.info("-" * 70)
 
     # ------------------------------------------------------------------ #
     # Main loop and shutdown
@@ -189,30 +374,31 @@ class WeatherStationApp:
         """
         Main application loop.
 
-        Keeps the application running until shutdown is requested.
+        Blocks (without polling) until shutdown is requested.
         """
         try:
-            while not self.shutdown_requested:
-                time.sleep(1.0)
-                # Optional: periodic health checks could be added here.
+            self._shutdown_evt.wait()
         except KeyboardInterrupt:
             logger.info("Keyboard interrupt received")
-            self.shutdown_requested = True
+            self.request_shutdown()
         finally:
             self.shutdown()
 
     def shutdown(self) -> None:
-        """Gracefully shut down all connections and display final statistics."""
-        if not self.shutdown_requested:
-            # If called directly without flag, mark shutdown
-            self.shutdown_requested = True
+        """
+        Gracefully shut down all connections and display final statistics.
+
+        Idempotent: calls after the first one return immediately.
+        """
+        with self._stats_lock:
+            if self._shut_down:
+                return
+            self._shut_down = True
 
-        logger.info("=" * 70)
-        logger.info("Shutting down Weather Station Application")
-        logger.info("=" * 70)
+        # If called directly without the event set, mark shutdown
+        self.request_shutdown()
 
-        # Show final statistics
-        self._show_statistics()
+        logger.info(_SHUTDOWN_BANNER)
 
         # Stop MQTT client
         if self.mqtt_client is not None:
@@ -222,7 +408,15 @@ class WeatherStationApp:
             except Exception:  # noqa: BLE001
                 logger.exception("Error while stopping MQTT client")
 
-        # Close InfluxDB connection
+        # Let the writer thread drain the queue before closing InfluxDB
+        if self._writer_thread is not None and self._queue is not None:
+            logger.info("Flushing queued samples...")
+            self._queue.put(None)
+            self._writer_thread.join()
+            self._writer_thread = None
+
+        # Close InfluxDB connection (flushes buffered writes, so the write
+        # callbacks have reported every batch before the final statistics)
         if self.influx_client is not None:
             logger.info("Closing InfluxDB connection...")
             try:
@@ -230,8 +424,10 @@ class WeatherStationApp:
             except Exception:  # noqa: BLE001
                 logger.exception("Error while closing InfluxDB client")
 
-        logger.info("Shutdown complete. Goodbye!")
-        logger.info("=" * 70)
+        # Show final statistics
+        self._show_statistics()
+
+        logger.info(_GOODBYE_BANNER)
 
 
 # ---------------------------------------------------------------------------
@@ -255,7 +451,7 @@ def signal_handler(signum: int, frame: object | None) -> None:
     logger.info("Received signal %s", signum)
     global _APP_INSTANCE
     if _APP_INSTANCE is not None:
-        _APP_INSTANCE.shutdown_requested = True
+        _APP_INSTANCE.request_shutdown()
     else:
         # If app is not initialized yet, exit immediately
         sys.exit(0)
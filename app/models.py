@@ -1,12 +1,81 @@
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-@dataclass
+# Accepted sensor ranges, shared with the raw-JSON write path in InfluxClient
+TEMPERATURE_RANGE_C = (-50, 100)
+HUMIDITY_RANGE_PCT = (0, 100)
+
+# Unpacked once so the per-sample checks compare against plain globals
+_TEMP_MIN, _TEMP_MAX = TEMPERATURE_RANGE_C
+_HUMIDITY_MIN, _HUMIDITY_MAX = HUMIDITY_RANGE_PCT
+
+# Reference point for converting timestamps to epoch nanoseconds
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_float(value) -> float:
+    """
+    Convert a decoded JSON value to float, accepting what msgspec does.
+    
+    Numbers and numeric strings are accepted, booleans are not. Shared by
+    the fallback payload decoder and the raw-JSON write path, so all
+    decoders agree with the msgspec tier on the same payload.
+    
+    Raises:
+        TypeError: If the value is a boolean or not a number/string
+        ValueError: If a string is not numeric
+    """
+    if value.__class__ is float:
+        return value
+    if value.__class__ is bool:
+        raise TypeError(f"Expected a number, got {value!r}")
+    return float(value)
+
+
+def to_int(value) -> int:
+    """
+    Convert a decoded JSON value to int, accepting what msgspec does.
+    
+    Integers, integral floats and integer strings are accepted; booleans
+    and fractional floats are rejected rather than truncated.
+    
+    Raises:
+        TypeError: If the value is a boolean or not a number/string
+        ValueError: If the value is not integral
+    """
+    if value.__class__ is int:
+        return value
+    if value.__class__ is bool:
+        raise TypeError(f"Expected an integer, got {value!r}")
+    if value.__class__ is float and not value.is_integer():
+        raise ValueError(f"Expected an integer, got {value!r}")
+    return int(value)
+
+
+def to_epoch_ns(ts: datetime) -> int:
+    """
+    Convert a datetime to epoch nanoseconds without float rounding.
+    
+    Naive datetimes are taken as UTC, as the InfluxDB write path always has.
+    """
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (ts - _EPOCH) // _ONE_MICROSECOND * 1000
+
+
+@dataclass(slots=True, frozen=True)
 class WeatherSample:
     """
     Represents a complete weather station reading.
     Timestamp is assigned by the container (Server Time).
+    timestamp_ns is the same instant in epoch nanoseconds; receivers that
+    already have it (e.g. from time.time_ns()) pass it in, otherwise it is
+    derived from timestamp.
+    
+    Field order is part of the interface: MQTTClient builds samples
+    positionally, so reorder fields only together with that call.
     """
     timestamp: datetime
     
@@ -26,20 +95,67 @@ class WeatherSample:
     gps_satellites: Optional[int] = None
     gps_fix_quality: Optional[int] = None
     
+    # Epoch nanoseconds of timestamp (used directly for InfluxDB writes)
+    timestamp_ns: Optional[int] = None
+    
     def __post_init__(self):
         """Validate data ranges to prevent bad data from polluting the DB."""
-        if not isinstance(self.timestamp, datetime):
-             raise TypeError(f"timestamp must be datetime, got {type(self.timestamp)}")
-
         # Basic Sanity Checks (expand as needed)
-        if not (-50 <= self.temperature_c <= 100):
+        if not (_TEMP_MIN <= self.temperature_c <= _TEMP_MAX):
             raise ValueError(f"Temp out of range: {self.temperature_c}")
         
-        if not (0 <= self.humidity_pct <= 100):
+        if not (_HUMIDITY_MIN <= self.humidity_pct <= _HUMIDITY_MAX):
             raise ValueError(f"Humidity out of range: {self.humidity_pct}")
+        
+        if self.timestamp_ns is None:
+            object.__setattr__(self, "timestamp_ns", to_epoch_ns(self.timestamp))
+
+    @classmethod
+    def unchecked(
+        cls,
+        timestamp: datetime,
+        temperature_c: float,
+        humidity_pct: float,
+        air_quality_co2_ppm: float,
+        flammable_gas_ppm: float,
+        toxic_gas_ppm: float,
+        uv_index: float,
+        battery_voltage: float,
+        gps_latitude: Optional[float] = None,
+        gps_longitude: Optional[float] = None,
+        gps_altitude_m: Optional[float] = None,
+        gps_satellites: Optional[int] = None,
+        gps_fix_quality: Optional[int] = None,
+        timestamp_ns: Optional[int] = None,
+    ) -> "WeatherSample":
+        """
+        Build a sample without running __post_init__ validation.
+        Only for bulk ingest of data that is already known to be valid.
+        """
+        sample = object.__new__(cls)
+        set_ = object.__setattr__
+        set_(sample, "timestamp", timestamp)
+        set_(sample, "temperature_c", temperature_c)
+        set_(sample, "humidity_pct", humidity_pct)
+        set_(sample, "air_quality_co2_ppm", air_quality_co2_ppm)
+        set_(sample, "flammable_gas_ppm", flammable_gas_ppm)
+        set_(sample, "toxic_gas_ppm", toxic_gas_ppm)
+        set_(sample, "uv_index", uv_index)
+        set_(sample, "battery_voltage", battery_voltage)
+        set_(sample, "gps_latitude", gps_latitude)
+        set_(sample, "gps_longitude", gps_longitude)
+        set_(sample, "gps_altitude_m", gps_altitude_m)
+        set_(sample, "gps_satellites", gps_satellites)
+        set_(sample, "gps_fix_quality", gps_fix_quality)
+        set_(
+            sample,
+            "timestamp_ns",
+            to_epoch_ns(timestamp) if timestamp_ns is None else timestamp_ns,
+        )
+        return sample
 
     def __repr__(self):
-        return (f"[{self.timestamp.strftime('%H:%M:%S')}] "
+        return (f"[{self.timestamp.time().isoformat('seconds')}] "
                 f"T:{self.temperature_c:.1f}C H:{self.humidity_pct:.1f}% "
                 f"CO2:{self.air_quality_co2_ppm:.0f} "
-                f"GPS:{self.gps_latitude},{self.gps_longitude}")
\ No newline at end of file
+                f"GPS:{self.gps_latitude},{self.gps_longitude}")
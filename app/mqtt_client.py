@@ -1,22 +1,150 @@
 """
 MQTT client for receiving and parsing weather station sensor data.
 Subscribes to a single topic, validates JSON payloads, and forwards
-parsed WeatherSample objects via callback.
+parsed WeatherSample objects via callback. Optionally, most payloads can
+be handed over raw to a fast-path callback instead.
 """
-import json
 import logging
+import socket
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 from typing import Callable, Optional
 
+import orjson
 import paho.mqtt.client as mqtt
+from paho.mqtt.subscribeoptions import SubscribeOptions
 
-from app.models import WeatherSample
+from app.models import WeatherSample, to_float, to_int
 from app.config import MQTTConfig, config
 
+# msgspec decodes and validates payloads in one pass; it is optional
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - depends on the environment
+    msgspec = None
 
 logger = logging.getLogger(__name__)
 
+# Module-level aliases for the per-message hot path
+_time_ns = time.time_ns
+_fromtimestamp = datetime.fromtimestamp
+
+# Recent message fingerprints kept to drop broker redeliveries (QoS >= 1)
+_DEDUP_WINDOW = 1024
+
+# MQTT 5 shared subscription prefix ($share/<group>/<topic>)
+_SHARED_TOPIC_PREFIX = "$share/"
+
+# Receive buffer requested for the broker socket, so bursts of messages
+# queue in the kernel instead of throttling the broker while callbacks run
+_SOCKET_RCVBUF_BYTES = 1 << 20
+
+
+class WeatherPayload(msgspec.Struct if msgspec is not None else object):
+    """
+    JSON payload published by the weather station.
+    
+    Expected JSON structure:
+    {
+        "temperature": 23.5,
+        "humidity": 65.2,
+        "co2": 450.0,
+        "flammable_gas": 120.5,
+        "toxic_gas": 85.3,
+        "uv_index": 5.2,
+        "battery": 3.7,
+        "latitude": -23.550520,
+        "longitude": -46.633308,
+        "altitude": 760.0,
+        "satellites": 8,
+        "fix_quality": 1
+    }
+    
+    GPS fields may be null or missing; unknown keys are ignored.
+    A msgspec Struct when msgspec is installed, a dataclass otherwise.
+    """
+    temperature: float
+    humidity: float
+    co2: float
+    flammable_gas: float
+    toxic_gas: float
+    uv_index: float
+    battery: float
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    altitude: Optional[float] = None
+    satellites: Optional[int] = None
+    fix_quality: Optional[int] = None
+
+
+def _payload_from_dict(data: dict, _f=to_float, _i=to_int) -> WeatherPayload:
+    """
+    Build a WeatherPayload from a decoded JSON dict (orjson fallback).
+    
+    Optional fields are inlined (one dict.get and None check each) rather
+    than going through a helper call per field. Values are converted with
+    to_float/to_int, which accept the same inputs as the msgspec decoder.
+    
+    Raises:
+        KeyError: If required fields are missing
+        TypeError: If the payload is not a JSON object or a value is a boolean
+        ValueError: If a value cannot be converted
+    """
+    if not isinstance(data, dict):
+        raise TypeError(f"Expected a JSON object, got {type(data).__name__}")
+    
+    g = data.get
+    v = g("latitude")
+    gps_latitude = _f(v) if v is not None else None
+    v = g("longitude")
+    gps_longitude = _f(v) if v is not None else None
+    v = g("altitude")
+    gps_altitude_m = _f(v) if v is not None else None
+    v = g("satellites")
+    gps_satellites = _i(v) if v is not None else None
+    v = g("fix_quality")
+    gps_fix_quality = _i(v) if v is not None else None
+    
+    return WeatherPayload(
+        _f(data["temperature"]),
+        _f(data["humidity"]),
+        _f(data["co2"]),
+        _f(data["flammable_gas"]),
+        _f(data["toxic_gas"]),
+        _f(data["uv_index"]),
+        _f(data["battery"]),
+        gps_latitude,
+        gps_longitude,
+        gps_altitude_m,
+        gps_satellites,
+        gps_fix_quality,
+    )
+
+
+# Payload decoder, chosen once at import: msgspec if installed, otherwise
+# orjson (a hard dependency) plus _payload_from_dict. Malformed JSON raises
+# _JSON_ERROR; msgspec's schema errors subclass it, so they are told apart
+# with _SCHEMA_ERROR (orjson has no schema step).
+if msgspec is not None:
+    # Non-strict so numeric strings are still accepted, as float()/int() are
+    _decode_payload = msgspec.json.Decoder(WeatherPayload, strict=False).decode
+    _JSON_ERROR = msgspec.DecodeError
+    _SCHEMA_ERROR = (msgspec.ValidationError,)
+    _DECODER_NAME = "msgspec"
+else:
+    WeatherPayload = dataclass(slots=True)(WeatherPayload)
+    
+    _loads = orjson.loads
+    _JSON_ERROR = orjson.JSONDecodeError
+    _SCHEMA_ERROR = ()
+    _DECODER_NAME = "orjson"
+    
+    def _decode_payload(payload: bytes) -> WeatherPayload:
+        return _payload_from_dict(_loads(payload))
+
 
 class MQTTClient:
     """
@@ -28,6 +156,8 @@ class MQTTClient:
         self,
         config: MQTTConfig,
         on_sample_received: Callable[[WeatherSample], None],
+        on_raw_message: Optional[Callable[[bytes, int], None]] = None,
+        sample_every: int = 10,
     ):
         """
         Initialize the MQTT client.
@@ -35,20 +165,58 @@ class MQTTClient:
         Args:
             config: MQTT connection configuration
             on_sample_received: Callback function invoked with each parsed WeatherSample
+            on_raw_message: Optional fast-path callback invoked with the raw
+                payload and reception time (epoch ns), skipping WeatherSample parsing
+            sample_every: When on_raw_message is set, every Nth message still
+                goes through on_sample_received (for validation and logging);
+                0 hands every message to on_raw_message
+            
+        Raises:
+            ValueError: If sample_every is negative
         """
+        if sample_every < 0:
+            raise ValueError(f"sample_every must be >= 0, got {sample_every}")
+        
         self.config = config
+        
+        # Settings read by the callbacks, snapshotted as plain attributes
+        self._topic = config.topic
+        self._qos = config.qos
+        self._keepalive = config.keepalive
+        
         self.on_sample_received = on_sample_received
+        self.on_raw_message = on_raw_message
+        self.sample_every = sample_every
+        self._messages_seen = 0
+        
+        # (topic, payload hash) of recent messages, oldest first (dict as an
+        # ordered set); only messages flagged as redeliveries are checked
+        self._recent: dict[tuple[str, int], None] = {}
+        
+        logger.info(f"MQTT payload decoder: {_DECODER_NAME}")
+        
+        # Timezone for sample timestamps, resolved once instead of per message
+        self._tz = self._get_timezone()
         
-        # Create paho MQTT client
+        # QoS 2 costs a four-packet handshake per message
+        if self._qos >= 2:
+            logger.warning(
+                f"MQTT QoS {self._qos} adds a 4-way handshake per message; "
+                "QoS 0 or 1 is usually enough for high-rate telemetry"
+            )
+        
+        # Create paho MQTT client (MQTT 5, for shared subscriptions)
         self.client = mqtt.Client(
             client_id=config.client_id,
-            protocol=mqtt.MQTTv311,
+            protocol=mqtt.MQTTv5,
         )
         
         # Set callbacks
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
         self.client.on_message = self._on_message
+        self.client.on_socket_open = self._on_socket_open
+        self.client.on_subscribe = self._on_subscribe
         
         # Optional authentication
         if config.username and config.password:
@@ -56,6 +224,9 @@ class MQTTClient:
             logger.info("MQTT authentication configured")
         
         self._is_connected = False
+        
+        # Set once the broker has acknowledged the subscription (SUBACK)
+        self._subscribed = threading.Event()
     
     def connect(self) -> None:
         """
@@ -69,7 +240,7 @@ class MQTTClient:
             self.client.connect(
                 host=self.config.host,
                 port=self.config.port,
-                keepalive=self.config.keepalive,
+                keepalive=self._keepalive,
             )
             logger.info("MQTT connection initiated")
         except Exception as e:
@@ -98,6 +269,18 @@ class MQTTClient:
         """Check if the client is currently connected to the broker."""
         return self._is_connected
     
+    def wait_until_subscribed(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the broker has acknowledged the topic subscription.
+        
+        Args:
+            timeout: Maximum time to wait in seconds (None waits forever)
+            
+        Returns:
+            True if subscribed, False if the timeout expired first
+        """
+        return self._subscribed.wait(timeout)
+    
     # -------------------------------------------------------------------------
     # Paho MQTT Callbacks
     # -------------------------------------------------------------------------
@@ -107,42 +290,95 @@ class MQTTClient:
         client: mqtt.Client,
         userdata,
         flags,
-        rc: int,
+        rc,
+        properties=None,
     ) -> None:
         """
         Callback invoked when the client connects to the broker.
         
         Args:
-            rc: Connection result code (0 = success)
+            rc: Connection reason code (0 = success)
+            properties: MQTT 5 CONNACK properties
         """
         if rc == 0:
             logger.info(f"Connected to MQTT broker successfully")
             self._is_connected = True
             
-            # Subscribe to the configured topic
-            result, mid = client.subscribe(self.config.topic, qos=self.config.qos)
+            # Subscribe to the configured topic, which may be a shared
+            # subscription ($share/<group>/<topic>) to load-balance messages
+            # across several instances. No Local is a protocol error there.
+            topic = self._topic
+            options = SubscribeOptions(
+                qos=self._qos,
+                noLocal=not topic.startswith(_SHARED_TOPIC_PREFIX),
+            )
+            result, mid = client.subscribe(topic, options=options)
             
             if result == mqtt.MQTT_ERR_SUCCESS:
-                logger.info(f"Subscribed to topic: {self.config.topic} (QoS={self.config.qos})")
+                logger.info(f"Subscribed to topic: {topic} (QoS={self._qos})")
             else:
-                logger.error(f"Failed to subscribe to topic: {self.config.topic}")
+                logger.error(f"Failed to subscribe to topic: {topic}")
         else:
-            logger.error(f"MQTT connection failed with code {rc}: {mqtt.connack_string(rc)}")
+            logger.error(f"MQTT connection failed with code {rc}")
             self._is_connected = False
     
+    def _on_subscribe(
+        self,
+        client: mqtt.Client,
+        userdata,
+        mid: int,
+        reason_codes,
+        properties=None,
+    ) -> None:
+        """
+        Callback invoked when the broker acknowledges a subscription.
+        
+        Args:
+            reason_codes: MQTT 5 SUBACK reason codes (>= 0x80 = refused)
+            properties: MQTT 5 SUBACK properties
+        """
+        refused = [rc for rc in reason_codes if rc.value >= 0x80]
+        if refused:
+            logger.error(f"Broker refused subscription to {self._topic}: {refused[0]}")
+            return
+        
+        logger.debug(f"Subscription to {self._topic} acknowledged")
+        self._subscribed.set()
+    
+    def _on_socket_open(
+        self,
+        client: mqtt.Client,
+        userdata,
+        sock,
+    ) -> None:
+        """
+        Callback invoked when the broker socket is opened (also on reconnect).
+        Enlarges the kernel receive buffer; failures are not fatal.
+        
+        Args:
+            sock: The newly opened socket
+        """
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _SOCKET_RCVBUF_BYTES)
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Could not set MQTT socket receive buffer: {e}")
+    
     def _on_disconnect(
         self,
         client: mqtt.Client,
         userdata,
-        rc: int,
+        rc,
+        properties=None,
     ) -> None:
         """
         Callback invoked when the client disconnects from the broker.
         
         Args:
-            rc: Disconnection result code (0 = clean disconnect)
+            rc: Disconnection reason code (0 = clean disconnect)
+            properties: MQTT 5 DISCONNECT properties
         """
         self._is_connected = False
+        self._subscribed.clear()
         
         if rc == 0:
             logger.info("Disconnected from MQTT broker cleanly")
@@ -157,136 +393,96 @@ class MQTTClient:
     ) -> None:
         """
         Callback invoked when a message is received on a subscribed topic.
-        Parses the JSON payload and forwards it to the registered callback.
+        Decodes and validates the JSON payload into a WeatherSample and
+        forwards it to the registered callback.
         
         Args:
             msg: The received MQTT message
         """
+        payload = msg.payload
+        if not payload:
+            # Empty payloads (e.g. cleared retained messages) carry no data
+            return
+        
+        # Drop QoS 1 redeliveries of a message already processed; identical
+        # readings that are not flagged as duplicates are still accepted
+        topic = msg.topic
+        recent = self._recent
+        key = (topic, hash(payload))
+        if msg.dup and key in recent:
+            logger.debug("Dropping duplicate message on topic %s", topic)
+            return
+        recent.pop(key, None)
+        recent[key] = None
+        if len(recent) > _DEDUP_WINDOW:
+            del recent[next(iter(recent))]
+        
         try:
-            logger.debug(f"Received message on topic {msg.topic}")
+            logger.debug("Received message on topic %s", topic)
+            
+            # Fast path: hand the raw payload over, except for every Nth
+            # message which is fully parsed for validation and logging
+            # (sample_every == 0: never parse)
+            seen = self._messages_seen
+            self._messages_seen = seen + 1
+            raw = self.on_raw_message
+            every = self.sample_every
+            if raw is not None and (not every or seen % every):
+                raw(payload, _time_ns())
+                return
             
-            # Parse JSON payload
-            payload = self._parse_json(msg.payload)
+            # Parse and validate the payload in a single pass
+            p = _decode_payload(payload)
             
-            # Convert to WeatherSample
-            sample = self._json_to_weather_sample(payload)
+            # Convert to WeatherSample with server-side timestamp
+            timestamp_ns = _time_ns()
+            # Positional construction: argument order must match the field
+            # order of WeatherSample (see app/models.py)
+            sample = WeatherSample(
+                _fromtimestamp(timestamp_ns / 1e9, self._tz),
+                p.temperature,
+                p.humidity,
+                p.co2,
+                p.flammable_gas,
+                p.toxic_gas,
+                p.uv_index,
+                p.battery,
+                p.latitude,
+                p.longitude,
+                p.altitude,
+                p.satellites,
+                p.fix_quality,
+                timestamp_ns,
+            )
             
             # Forward to callback
             self.on_sample_received(sample)
             
-            logger.debug(f"Successfully processed message: {sample}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Successfully processed message: %s", sample)
             
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in MQTT message: {e}")
-            logger.debug(f"Raw payload: {msg.payload}")
-        
         except (KeyError, TypeError, ValueError) as e:
-            logger.error(f"Failed to parse weather sample: {e}")
-            logger.debug(f"Payload: {msg.payload}")
+            if isinstance(e, _JSON_ERROR) and not isinstance(e, _SCHEMA_ERROR):
+                logger.error("Invalid JSON in MQTT message: %s", e)
+            else:
+                logger.error("Failed to parse weather sample: %r", e)
+            logger.debug("Payload: %r", payload)
         
         except Exception as e:
-            logger.exception(f"Unexpected error processing MQTT message: {e}")
+            logger.exception("Unexpected error processing MQTT message: %s", e)
     
     # -------------------------------------------------------------------------
-    # JSON Parsing and Validation
+    # Helpers
     # -------------------------------------------------------------------------
     
     @staticmethod
-    def _parse_json(payload: bytes) -> dict:
-        """
-        Parse JSON payload from MQTT message.
-        
-        Args:
-            payload: Raw bytes from MQTT message
-            
-        Returns:
-            Parsed JSON as dictionary
-            
-        Raises:
-            json.JSONDecodeError: If payload is not valid JSON
-        """
-        return json.loads(payload.decode("utf-8"))
-    
-    def _json_to_weather_sample(self, data: dict) -> WeatherSample:
-        """
-        Convert a JSON dictionary to a WeatherSample object.
-        
-        Expected JSON structure:
-        {
-            "temperature": 23.5,
-            "humidity": 65.2,
-            "co2": 450.0,
-            "flammable_gas": 120.5,
-            "toxic_gas": 85.3,
-            "uv_index": 5.2,
-            "battery": 3.7,
-            "latitude": -23.550520,
-            "longitude": -46.633308,
-            "altitude": 760.0,
-            "satellites": 8,
-            "fix_quality": 1
-        }
-        
-        Args:
-            data: Parsed JSON dictionary
-            
-        Returns:
-            WeatherSample object with server-side timestamp
-            
-        Raises:
-            KeyError: If required fields are missing
-            ValueError: If data validation fails
-        """
-        
+    def _get_timezone() -> ZoneInfo:
+        """Resolve the configured timezone (UTC if invalid)."""
         try:
             tz = ZoneInfo(config.timezone)
         except Exception:
             # Fallback to UTC if the timezone string is invalid
             logger.warning(f"Invalid timezone '{config.timezone}', falling back to UTC")
             tz = ZoneInfo("UTC")
-
-        timestamp = datetime.now(tz)
-        
-        # Required fields
-        temperature_c = float(data["temperature"])
-        humidity_pct = float(data["humidity"])
-        air_quality_co2_ppm = float(data["co2"])
-        flammable_gas_ppm = float(data["flammable_gas"])
-        toxic_gas_ppm = float(data["toxic_gas"])
-        uv_index = float(data["uv_index"])
-        battery_voltage = float(data["battery"])
-        
-        # Optional GPS fields (may be null or missing)
-        gps_latitude = self._get_optional_float(data, "latitude")
-        gps_longitude = self._get_optional_float(data, "longitude")
-        gps_altitude_m = self._get_optional_float(data, "altitude")
-        gps_satellites = self._get_optional_int(data, "satellites")
-        gps_fix_quality = self._get_optional_int(data, "fix_quality")
         
-        return WeatherSample(
-            timestamp=timestamp,
-            temperature_c=temperature_c,
-            humidity_pct=humidity_pct,
-            air_quality_co2_ppm=air_quality_co2_ppm,
-            flammable_gas_ppm=flammable_gas_ppm,
-            toxic_gas_ppm=toxic_gas_ppm,
-            uv_index=uv_index,
-            battery_voltage=battery_voltage,
-            gps_latitude=gps_latitude,
-            gps_longitude=gps_longitude,
-            gps_altitude_m=gps_altitude_m,
-            gps_satellites=gps_satellites,
-            gps_fix_quality=gps_fix_quality,
-        )
-    
-    @staticmethod
-    def _get_optional_float(data: dict, key: str) -> Optional[float]:
-        """Safely extract optional float value from dictionary."""
-        value = data.get(key)
-        return float(value) if value is not None else None
-    
-    @staticmethod
-    def _get_optional_int(data: dict, key: str) -> Optional[int]:
-        """Safely extract optional integer value from dictionary."""
-        value = data.get(key)
-        return int(value) if value is not None else None
+        return tz
@@ -8,7 +8,6 @@ This test validates the complete data flow:
 4. Compare published data with retrieved data
 """
 
-import json
 import logging
 import time
 import threading
@@ -16,6 +15,8 @@ from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Any
 from zoneinfo import ZoneInfo
 
+import numpy as np
+import orjson
 import pytest
 import paho.mqtt.client as mqtt
 
@@ -109,44 +110,60 @@ def generate_test_samples(count: int = 5) -> List[Dict[str, Any]]:
     Returns:
         List of dictionaries representing weather samples
     """
-    samples = []
-    base_values = {
-        "temperature": 23.5,
-        "humidity": 65.0,
-        "co2": 450.0,
-        "flammable_gas": 120.0,
-        "toxic_gas": 85.0,
-        "uv_index": 5.2,
-        "battery": 3.7,
-        "latitude": -19.869374,
-        "longitude": -43.963795,
-        "altitude": 760.0,
-        "satellites": 8,
-        "fix_quality": 1,
+    # One vector operation per field instead of a Python loop per sample
+    idx = np.arange(count, dtype=np.float64)
+    columns = {
+        "temperature": 23.5 + idx * 0.5,
+        "humidity": 65.0 - idx * 0.3,
+        "co2": 450.0 + idx * 5,
+        "flammable_gas": 120.0 + idx * 2,
+        "toxic_gas": 85.0 + idx * 1.5,
+        "uv_index": 5.2 + idx * 0.1,
+        "battery": 3.7 - idx * 0.02,
+        "latitude": np.full(count, -19.869374),
+        "longitude": np.full(count, -43.963795),
+        "altitude": 760.0 + idx * 5,
+        "satellites": np.full(count, 8),
+        "fix_quality": np.full(count, 1),
     }
     
-    for i in range(count):
-        # Create variations in the data
-        sample = {
-            "temperature": base_values["temperature"] + (i * 0.5),
-            "humidity": base_values["humidity"] - (i * 0.3),
-            "co2": base_values["co2"] + (i * 5),
-            "flammable_gas": base_values["flammable_gas"] + (i * 2),
-            "toxic_gas": base_values["toxic_gas"] + (i * 1.5),
-            "uv_index": base_values["uv_index"] + (i * 0.1),
-            "battery": base_values["battery"] - (i * 0.02),
-            "latitude": base_values["latitude"],
-            "longitude": base_values["longitude"],
-            "altitude": base_values["altitude"] + (i * 5),
-            "satellites": base_values["satellites"],
-            "fix_quality": base_values["fix_quality"],
-        }
-        samples.append(sample)
+    # tolist() yields native floats/ints, so the dicts serialize as before
+    keys = list(columns)
+    rows = zip(*(column.tolist() for column in columns.values()))
+    samples = [dict(zip(keys, row)) for row in rows]
     
     logger.info(f"Generated {count} test samples")
     return samples
 
 
+def wait_for_count(
+    client: InfluxClient,
+    target: int,
+    timeout: float = 5.0,
+    interval: float = 0.1,
+) -> int:
+    """
+    Poll the InfluxDB record count until it reaches a target.
+    
+    Args:
+        client: Connected InfluxDB client
+        target: Record count to wait for
+        timeout: Maximum time to wait in seconds
+        interval: Delay between polls in seconds
+        
+    Returns:
+        The last observed record count (may be below target on timeout)
+    """
+    deadline = time.monotonic() + timeout
+    count = client.query_count()
+    
+    while count < target and time.monotonic() < deadline:
+        time.sleep(interval)
+        count = client.query_count()
+    
+    return count
+
+
 # ---------------------------------------------------------------------------
 # Application Control
 # ---------------------------------------------------------------------------
@@ -174,10 +191,9 @@ class AppController:
                 self.started.set()
                 logger.info("App setup complete, entering run loop")
                 
-                # Run until shutdown is requested
-                while not self.app.shutdown_requested: # type: ignore
-                    time.sleep(0.5)
-                    
+                # Block on the app's shutdown event until stop() is called
+                self.app.run() # type: ignore
+
             except Exception as exc:
                 logger.exception(f"Error in app thread: {exc}")
                 self.error = exc
@@ -193,15 +209,16 @@ class AppController:
         if self.error:
             raise self.error
         
-        # Give the MQTT client a moment to fully subscribe
-        time.sleep(2)
+        # Wait until the broker has acknowledged the app's subscription
+        if not self.app.mqtt_client.wait_until_subscribed(timeout=10): # type: ignore
+            raise TimeoutError("Application did not subscribe within 10 seconds")
         logger.info("App is ready to receive data")
     
     def stop(self) -> None:
         """Stop the application gracefully."""
         if self.app:
             logger.info("Requesting app shutdown")
-            self.app.shutdown_requested = True
+            self.app.request_shutdown()
             
             if self.thread:
                 self.thread.join(timeout=10)
@@ -236,6 +253,9 @@ def test_mqtt_to_influx_integration(mqtt_publisher, influx_test_client):
     test_samples = generate_test_samples(count=5)
     logger.info(f"Test samples to publish: {len(test_samples)}")
     
+    # Serialize up front so the publish loop only does I/O
+    payloads = [orjson.dumps(sample) for sample in test_samples]
+    
     # Step 3: Start the application
     app_controller = AppController()
     
@@ -246,8 +266,7 @@ def test_mqtt_to_influx_integration(mqtt_publisher, influx_test_client):
         logger.info("Publishing test samples via MQTT...")
         publish_timestamps = []
         
-        for idx, sample in enumerate(test_samples, 1):
-            payload = json.dumps(sample)
+        for idx, payload in enumerate(payloads, 1):
             result = mqtt_publisher.publish(
                 topic=config.mqtt.topic,
                 payload=payload,
@@ -259,16 +278,14 @@ def test_mqtt_to_influx_integration(mqtt_publisher, influx_test_client):
                 publish_timestamps.append(datetime.now(ZoneInfo(config.timezone)))
             else:
                 logger.error(f"Failed to publish sample {idx}: {result.rc}")
-            
-            # Small delay between publications
-            time.sleep(0.5)
         
         # Step 5: Wait for data to be processed and written
         logger.info("Waiting for samples to be processed...")
-        time.sleep(5)  # Give enough time for MQTT delivery + DB write
+        final_count = wait_for_count(
+            influx_test_client, initial_count + len(test_samples)
+        )
         
         # Step 6: Verify new records were created
-        final_count = influx_test_client.query_count()
         logger.info(f"Final InfluxDB record count: {final_count}")
         
         new_records = final_count - initial_count
@@ -379,7 +396,7 @@ def test_data_consistency(mqtt_publisher, influx_test_client):
         
         # Publish the known sample
         logger.info("Publishing known sample...")
-        payload = json.dumps(known_sample)
+        payload = orjson.dumps(known_sample)
         result = mqtt_publisher.publish(
             topic=config.mqtt.topic,
             payload=payload,
@@ -388,11 +405,8 @@ def test_data_consistency(mqtt_publisher, influx_test_client):
         
         assert result.rc == mqtt.MQTT_ERR_SUCCESS, "Failed to publish known sample"
         
-        # Wait for processing
-        time.sleep(3)
-        
-        # Verify it was written
-        final_count = influx_test_client.query_count()
+        # Wait for processing, then verify it was written
+        final_count = wait_for_count(influx_test_client, initial_count + 1)
         assert final_count > initial_count, "Sample was not written to database"
         
         # Query the most recent sample
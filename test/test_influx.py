@@ -2,53 +2,117 @@
 Test script for InfluxDB client.
 Tests connection, write operations, and queries.
 """
+import dataclasses
 import logging
+import os
+import threading
 import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from datetime import datetime, timezone, timedelta
 from zoneinfo import ZoneInfo
 
-from app.influx_client import InfluxClient
+from app.influx_client import HTTP_POOL_MAXSIZE, InfluxClient
 from app.config import config
 from app.models import WeatherSample
 
-# Configure logging
+# Configure logging (LOG_LEVEL=DEBUG for verbose output; it slows high-rate runs)
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=getattr(logging, config.log_level.upper(), logging.INFO),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
 logger = logging.getLogger(__name__)
 
+# Micro-batch size and the lower bound on write throughput (points/sec);
+# the bound depends on the machine and server, so it is only asserted when
+# INFLUX_MIN_POINTS_PER_SEC is set (0 = report the rate only)
+MICROBATCH_SIZE = 5000
+MIN_POINTS_PER_SEC = float(os.getenv("INFLUX_MIN_POINTS_PER_SEC", "0"))
+
+# Parallel query block: worker count and one-off wait for flushed writes
+# to become visible to queries
+QUERY_WORKERS = 4
+QUERY_SETTLE_SECONDS = 2
+
+# Station timezone, resolved once (config is frozen)
+_TZ = ZoneInfo(config.timezone)
+
+
+def now() -> datetime:
+    """Current time in the station timezone."""
+    return datetime.now(_TZ)
+
+
+# Dummy-sample fields that don't vary with the offset
+_BASE = dict(
+    flammable_gas_ppm=120.5,
+    toxic_gas_ppm=85.3,
+    uv_index=5.2,
+    gps_latitude=-23.550520,
+    gps_longitude=-46.633308,
+    gps_altitude_m=760.0,
+    gps_satellites=8,
+    gps_fix_quality=1,
+)
+
 
 def create_dummy_sample(offset_seconds: int = 0) -> WeatherSample:
     """Create a dummy weather sample for testing."""
-    tz = ZoneInfo(config.timezone)
-    timestamp = datetime.now(tz) - timedelta(seconds=offset_seconds)
+    timestamp = now() - timedelta(seconds=offset_seconds)
     
     return WeatherSample(
         timestamp=timestamp,
         temperature_c=23.5 + (offset_seconds * 0.1),
         humidity_pct=65.2 - (offset_seconds * 0.05),
         air_quality_co2_ppm=450.0 + (offset_seconds * 2),
-        flammable_gas_ppm=120.5,
-        toxic_gas_ppm=85.3,
-        uv_index=5.2,
         battery_voltage=3.7 - (offset_seconds * 0.001),
-        gps_latitude=-23.550520,
-        gps_longitude=-46.633308,
-        gps_altitude_m=760.0,
-        gps_satellites=8,
-        gps_fix_quality=1,
+        **_BASE,
     )
 
 
+def create_microbatch(count: int = MICROBATCH_SIZE) -> list[WeatherSample]:
+    """Create samples 1 ms apart (distinct points) from one dummy sample."""
+    base = create_dummy_sample()
+    step = timedelta(milliseconds=1)
+    
+    # timestamp_ns=None so each copy derives it from its own timestamp
+    return [
+        dataclasses.replace(base, timestamp=base.timestamp - i * step, timestamp_ns=None)
+        for i in range(count)
+    ]
+
+
+class WriteTally:
+    """Points acknowledged by the batching writer's success/error callbacks."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+    
+    def on_written(self, count: int) -> None:
+        with self._lock:
+            self.written += count
+    
+    def on_failed(self, count: int, exception: Exception) -> None:
+        with self._lock:
+            self.failed += count
+
+
+tally = WriteTally()
+
+
 def test_connection():
     """Test 1: Connection to InfluxDB."""
     logger.info("=" * 60)
     logger.info("TEST 1: Connection")
     logger.info("=" * 60)
     
-    influx = InfluxClient(config.influxdb)
+    influx = InfluxClient(
+        config.influxdb,
+        on_points_written=tally.on_written,
+        on_points_failed=tally.on_failed,
+    )
     
     try:
         influx.connect()
@@ -59,26 +123,67 @@ def test_connection():
         raise
 
 
-def test_write_single(influx: InfluxClient):
-    """Test 2: Write a single sample."""
+def test_write_microbatch(influx: InfluxClient):
+    """Test 2: Write a micro-batch of samples in a single call."""
     logger.info("=" * 60)
-    logger.info("TEST 2: Write Single Sample")
+    logger.info("TEST 2: Write Micro-Batch")
     logger.info("=" * 60)
     
-    sample = create_dummy_sample()
+    samples = create_microbatch()
     
     try:
-        influx.write_sample(sample)
-        logger.info(f"✓ Wrote sample: {sample}")
+        influx.write_samples_batch(samples)
+        logger.info(f"✓ Wrote {len(samples)} samples in one batch")
     except Exception as e:
-        logger.error(f"✗ Write failed: {e}")
+        logger.error(f"✗ Micro-batch write failed: {e}")
         raise
 
 
+def test_write_throughput(influx: InfluxClient):
+    """Test 3: Measure end-to-end write throughput (guards against per-point writes)."""
+    logger.info("=" * 60)
+    logger.info("TEST 3: Write Throughput")
+    logger.info("=" * 60)
+    
+    samples = create_microbatch()
+    
+    # Send earlier writes first so only this batch is timed
+    influx.flush()
+    written_before, failed_before = tally.written, tally.failed
+    
+    try:
+        # write() only queues points; flush() returns once every batch has
+        # been sent and acknowledged through the callbacks
+        start = time.perf_counter()
+        influx.write_samples_batch(samples)
+        influx.flush()
+        elapsed = time.perf_counter() - start
+    except Exception as e:
+        logger.error(f"✗ Throughput write failed: {e}")
+        raise
+    
+    written = tally.written - written_before
+    failed = tally.failed - failed_before
+    assert failed == 0 and written == len(samples), (
+        f"Server acknowledged {written} of {len(samples)} points ({failed} failed)"
+    )
+    
+    points_per_sec = written / max(elapsed, 1e-9)
+    logger.info(f"✓ {written} points written in {elapsed * 1000:.1f} ms "
+                f"({points_per_sec:,.0f} points/sec)")
+    
+    if not MIN_POINTS_PER_SEC:
+        return
+    assert points_per_sec > MIN_POINTS_PER_SEC, (
+        f"Write throughput too low: {points_per_sec:,.0f} points/sec "
+        f"(expected > {MIN_POINTS_PER_SEC:,.0f})"
+    )
+
+
 def test_write_batch(influx: InfluxClient):
-    """Test 3: Write multiple samples in batch."""
+    """Test 4: Write multiple samples in batch."""
     logger.info("=" * 60)
-    logger.info("TEST 3: Write Batch Samples")
+    logger.info("TEST 4: Write Batch Samples")
     logger.info("=" * 60)
     
     # Create 5 samples with different timestamps
@@ -92,10 +197,30 @@ def test_write_batch(influx: InfluxClient):
         raise
 
 
+def test_connection_reuse(influx: InfluxClient):
+    """Test 5: Check that writes reuse pooled keep-alive connections."""
+    logger.info("=" * 60)
+    logger.info("TEST 5: HTTP Connection Reuse")
+    logger.info("=" * 60)
+    
+    # Make sure every queued write has actually been sent before counting
+    influx.flush()
+    opened = influx.http_connections_opened()
+    
+    logger.info(f"✓ TCP connections opened by all writes so far: {opened}")
+    
+    # Writes may run in parallel, so up to one connection per pool slot;
+    # more means connections were dropped instead of kept alive
+    assert opened <= HTTP_POOL_MAXSIZE, (
+        f"Writes opened {opened} TCP connections "
+        f"(expected <= {HTTP_POOL_MAXSIZE}); keep-alive is not reused"
+    )
+
+
 def test_query_count(influx: InfluxClient):
-    """Test 4: Count total records."""
+    """Test 6: Count total records."""
     logger.info("=" * 60)
-    logger.info("TEST 4: Query Record Count")
+    logger.info("TEST 6: Query Record Count")
     logger.info("=" * 60)
     
     try:
@@ -107,9 +232,9 @@ def test_query_count(influx: InfluxClient):
 
 
 def test_query_latest(influx: InfluxClient):
-    """Test 5: Query latest sample."""
+    """Test 7: Query latest sample."""
     logger.info("=" * 60)
-    logger.info("TEST 5: Query Latest Sample")
+    logger.info("TEST 7: Query Latest Sample")
     logger.info("=" * 60)
     
     try:
@@ -130,9 +255,9 @@ def test_query_latest(influx: InfluxClient):
 
 
 def test_query_recent(influx: InfluxClient):
-    """Test 6: Query recent samples."""
+    """Test 8: Query recent samples."""
     logger.info("=" * 60)
-    logger.info("TEST 6: Query Recent Samples")
+    logger.info("TEST 8: Query Recent Samples")
     logger.info("=" * 60)
     
     try:
@@ -152,13 +277,12 @@ def test_query_recent(influx: InfluxClient):
 
 
 def test_query_time_range(influx: InfluxClient):
-    """Test 7: Query time range."""
+    """Test 9: Query time range."""
     logger.info("=" * 60)
-    logger.info("TEST 7: Query Time Range")
+    logger.info("TEST 9: Query Time Range")
     logger.info("=" * 60)
     
-    tz = ZoneInfo(config.timezone)
-    end = datetime.now(tz)
+    end = now()
     start = end - timedelta(hours=1)  # Last hour
     
     try:
@@ -173,6 +297,23 @@ def test_query_time_range(influx: InfluxClient):
         raise
 
 
+def run_query_tests_parallel(influx: InfluxClient):
+    """Run the independent query tests concurrently on one shared client."""
+    tests = (test_query_count, test_query_latest, test_query_recent, test_query_time_range)
+    
+    with ThreadPoolExecutor(max_workers=QUERY_WORKERS) as pool:
+        futures = [pool.submit(test, influx) for test in tests]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+    
+    # Re-raise the first failure (the executor has already drained the rest)
+    for future in done:
+        future.result()
+    
+    # Queries share the client's single Arrow Flight (gRPC) channel, which
+    # multiplexes concurrent calls; the HTTP pool above is only used by writes
+    logger.info(f"✓ {len(tests)} concurrent queries done")
+
+
 def main():
     """Run all tests."""
     logger.info("Starting InfluxDB client tests...")
@@ -183,30 +324,24 @@ def main():
     try:
         # Test 1: Connection
         influx = test_connection()
-        time.sleep(1)
         
-        # Test 2: Write single sample
-        test_write_single(influx)
-        time.sleep(1)
+        # Test 2: Write micro-batch
+        test_write_microbatch(influx)
         
-        # Test 3: Write batch
-        test_write_batch(influx)
-        time.sleep(1)
+        # Test 3: Write throughput
+        test_write_throughput(influx)
         
-        # Test 4: Count
-        test_query_count(influx)
-        time.sleep(1)
+        # Test 4: Write batch
+        test_write_batch(influx)
         
-        # Test 5: Latest
-        test_query_latest(influx)
-        time.sleep(1)
+        # Test 5: Keep-alive reuse (flushes all writes above first)
+        test_connection_reuse(influx)
         
-        # Test 6: Recent
-        test_query_recent(influx)
-        time.sleep(1)
+        # Let the flushed writes become visible to queries
+        time.sleep(QUERY_SETTLE_SECONDS)
         
-        # Test 7: Time range
-        test_query_time_range(influx)
+        # Tests 6-9: Count, latest, recent and time range, concurrently
+        run_query_tests_parallel(influx)
         
         logger.info("=" * 60)
         logger.info("ALL TESTS PASSED! ✓")
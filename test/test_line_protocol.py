@@ -0,0 +1,169 @@
+"""
+Unit tests for the generated line protocol formatters in InfluxClient.
+
+Runs offline: only the formatters built in InfluxClient.__init__ are
+exercised, no connection to InfluxDB is made.
+"""
+
+import math
+from datetime import datetime, timezone
+
+import pytest
+
+from app.config import InfluxDBConfig
+from app.influx_client import InfluxClient
+from app.models import WeatherSample
+
+
+TIMESTAMP = datetime(2026, 1, 1, tzinfo=timezone.utc)
+TIMESTAMP_NS = 1767225600000000000
+
+# Payload as published by the station, and its expected line protocol
+PAYLOAD = {
+    "temperature": 23.5,
+    "humidity": 65.2,
+    "co2": 450.0,
+    "flammable_gas": 120.5,
+    "toxic_gas": 85.3,
+    "uv_index": 5.2,
+    "battery": 3.7,
+    "latitude": -23.55052,
+    "longitude": -46.633308,
+    "altitude": 760.0,
+    "satellites": 8,
+    "fix_quality": 1,
+}
+EXPECTED_FIELDS = (
+    "temperature_c=23.5,humidity_pct=65.2,air_quality_co2_ppm=450.0,"
+    "flammable_gas_ppm=120.5,toxic_gas_ppm=85.3,uv_index=5.2,battery_voltage=3.7,"
+    "gps_latitude=-23.55052,gps_longitude=-46.633308,gps_altitude_m=760.0,"
+    "gps_satellites=8i,gps_fix_quality=1i"
+)
+
+
+# ---------------------------------------------------------------------------
+# Test Fixtures
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def influx() -> InfluxClient:
+    """InfluxClient with the default measurement (never connected)."""
+    return InfluxClient(InfluxDBConfig(measurement="weather_data"))
+
+
+def make_sample(**overrides) -> WeatherSample:
+    """Build the WeatherSample matching PAYLOAD, with optional overrides."""
+    fields = dict(
+        timestamp=TIMESTAMP,
+        temperature_c=23.5,
+        humidity_pct=65.2,
+        air_quality_co2_ppm=450.0,
+        flammable_gas_ppm=120.5,
+        toxic_gas_ppm=85.3,
+        uv_index=5.2,
+        battery_voltage=3.7,
+        gps_latitude=-23.55052,
+        gps_longitude=-46.633308,
+        gps_altitude_m=760.0,
+        gps_satellites=8,
+        gps_fix_quality=1,
+    )
+    fields.update(overrides)
+    return WeatherSample(**fields)
+
+
+# ---------------------------------------------------------------------------
+# Test Cases
+# ---------------------------------------------------------------------------
+
+def test_sample_to_line_protocol(influx):
+    """A full sample is formatted with every field, in schema order."""
+    assert influx._fmt_lp(make_sample()) == f"weather_data {EXPECTED_FIELDS} {TIMESTAMP_NS}"
+
+
+def test_naive_timestamp_is_taken_as_utc(influx):
+    """A sample built from a naive datetime is written as UTC."""
+    sample = make_sample(timestamp=TIMESTAMP.replace(tzinfo=None))
+    
+    assert sample.timestamp_ns == TIMESTAMP_NS
+    assert influx._fmt_lp(sample) == influx._fmt_lp(make_sample())
+
+
+def test_json_path_matches_sample_path(influx):
+    """The raw-JSON fast path produces the same text as the WeatherSample path."""
+    assert influx._json_to_lp(PAYLOAD, TIMESTAMP_NS) == influx._fmt_lp(make_sample())
+
+
+def test_measurement_escaping():
+    """Commas and spaces in the measurement name are escaped."""
+    influx = InfluxClient(InfluxDBConfig(measurement="weather data,v2"))
+    
+    line = influx._fmt_lp(make_sample())
+    
+    assert line.startswith("weather\\ data\\,v2 temperature_c=23.5,")
+    assert influx._json_to_lp(PAYLOAD, TIMESTAMP_NS) == line
+
+
+def test_missing_gps_fields_are_omitted(influx):
+    """GPS fields that are None (or absent from the JSON) are left out."""
+    sample = make_sample(gps_latitude=None, gps_longitude=None, gps_fix_quality=None)
+    payload = {k: v for k, v in PAYLOAD.items() if k not in ("latitude", "fix_quality")}
+    payload["longitude"] = None
+    
+    line = influx._fmt_lp(sample)
+    
+    assert "gps_latitude" not in line
+    assert "gps_longitude" not in line
+    assert "gps_fix_quality" not in line
+    assert line.endswith(f",gps_altitude_m=760.0,gps_satellites=8i {TIMESTAMP_NS}")
+    assert influx._json_to_lp(payload, TIMESTAMP_NS) == line
+
+
+def test_integer_suffix(influx):
+    """Only the integer GPS fields get the "i" suffix, even if sent as floats."""
+    payload = dict(PAYLOAD, co2=450, satellites=8.0, fix_quality="1")
+    
+    line = influx._json_to_lp(payload, TIMESTAMP_NS)
+    
+    assert ",air_quality_co2_ppm=450.0," in line
+    assert ",gps_satellites=8i,gps_fix_quality=1i " in line
+    assert influx._fmt_lp(make_sample(gps_satellites=8.0)) == influx._fmt_lp(make_sample())
+
+
+@pytest.mark.parametrize("bad", [math.nan, math.inf, -math.inf])
+def test_non_finite_fields_are_skipped(influx, bad):
+    """NaN and +/-inf are dropped field by field instead of written as text."""
+    line = influx._fmt_lp(make_sample(air_quality_co2_ppm=bad, gps_altitude_m=bad))
+    
+    assert "air_quality_co2_ppm" not in line
+    assert "gps_altitude_m" not in line
+    assert "nan" not in line and "inf" not in line
+    assert line.startswith("weather_data temperature_c=23.5,humidity_pct=65.2,flammable_gas_ppm=")
+
+
+@pytest.mark.parametrize("bad", ["nan", "inf", "-inf", math.nan])
+def test_json_non_finite_fields_are_skipped(influx, bad):
+    """The JSON path skips non-finite values too, including "nan" strings."""
+    line = influx._json_to_lp(dict(PAYLOAD, co2=bad, latitude=bad), TIMESTAMP_NS)
+    
+    assert "air_quality_co2_ppm" not in line
+    assert "gps_latitude" not in line
+    assert "nan" not in line and "inf" not in line
+
+
+@pytest.mark.parametrize("bad", ["nan", "inf"])
+def test_json_non_finite_temperature_is_rejected(influx, bad):
+    """A non-finite temperature fails the range check rather than being skipped."""
+    with pytest.raises(ValueError, match="Temp out of range"):
+        influx._json_to_lp(dict(PAYLOAD, temperature=bad), TIMESTAMP_NS)
+
+
+def test_record_without_finite_fields_is_rejected(influx):
+    """A record whose fields are all non-finite raises instead of emitting no fields."""
+    nan = math.nan
+    sample = WeatherSample.unchecked(
+        TIMESTAMP, nan, nan, nan, nan, nan, nan, nan, timestamp_ns=TIMESTAMP_NS
+    )
+    
+    with pytest.raises(ValueError, match="No finite field values"):
+        influx._fmt_lp(sample)
@@ -3,16 +3,17 @@ Simple test script for MQTT client.
 Run this to verify MQTT connection and JSON parsing.
 """
 import logging
-import time
+import signal
+import threading
 
 from app.mqtt_client import MQTTClient
 from app.config import config
 from app.models import WeatherSample
 
 
-# Configure logging
+# Configure logging (LOG_LEVEL=DEBUG for verbose output; it slows high-rate runs)
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=getattr(logging, config.log_level.upper(), logging.INFO),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
@@ -23,21 +24,21 @@ def on_sample_received(sample: WeatherSample):
     """Callback invoked when a weather sample is received."""
     logger.info("=" * 60)
     logger.info("RECEIVED WEATHER SAMPLE:")
-    logger.info(f"  Timestamp: {sample.timestamp}")
-    logger.info(f"  Temperature: {sample.temperature_c}°C")
-    logger.info(f"  Humidity: {sample.humidity_pct}%")
-    logger.info(f"  CO2: {sample.air_quality_co2_ppm} ppm")
-    logger.info(f"  Flammable Gas: {sample.flammable_gas_ppm} ppm")
-    logger.info(f"  Toxic Gas: {sample.toxic_gas_ppm} ppm")
-    logger.info(f"  UV Index: {sample.uv_index}")
-    logger.info(f"  Battery: {sample.battery_voltage}V")
+    logger.info("  Timestamp: %s", sample.timestamp)
+    logger.info("  Temperature: %s°C", sample.temperature_c)
+    logger.info("  Humidity: %s%%", sample.humidity_pct)
+    logger.info("  CO2: %s ppm", sample.air_quality_co2_ppm)
+    logger.info("  Flammable Gas: %s ppm", sample.flammable_gas_ppm)
+    logger.info("  Toxic Gas: %s ppm", sample.toxic_gas_ppm)
+    logger.info("  UV Index: %s", sample.uv_index)
+    logger.info("  Battery: %sV", sample.battery_voltage)
     
     if sample.gps_latitude and sample.gps_longitude:
-        logger.info(f"  GPS: ({sample.gps_latitude}, {sample.gps_longitude})")
-        logger.info(f"  Altitude: {sample.gps_altitude_m}m")
-        logger.info(f"  Satellites: {sample.gps_satellites}")
+        logger.info("  GPS: (%s, %s)", sample.gps_latitude, sample.gps_longitude)
+        logger.info("  Altitude: %sm", sample.gps_altitude_m)
+        logger.info("  Satellites: %s", sample.gps_satellites)
     else:
-        logger.info(f"  GPS: No fix")
+        logger.info("  GPS: No fix")
     
     logger.info("=" * 60)
 
@@ -53,18 +54,20 @@ def main():
         on_sample_received=on_sample_received,
     )
     
+    # Ctrl+C only sets the event, so an interrupt during connect or
+    # subscribe still ends in the cleanup below instead of a traceback
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    
     try:
         # Connect and start
         mqtt_client.connect()
-        mqtt_client.start()
-        
-        logger.info("Waiting for messages... (Press Ctrl+C to stop)")
+        if not stop.is_set():
+            mqtt_client.start()
+            logger.info("Waiting for messages... (Press Ctrl+C to stop)")
         
-        # Keep running
-        while True:
-            time.sleep(1)
-    
-    except KeyboardInterrupt:
+        # Idle until Ctrl+C (no periodic wake-ups)
+        stop.wait()
         logger.info("Interrupted by user")
     
     except Exception as e:
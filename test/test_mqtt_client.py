@@ -0,0 +1,267 @@
+"""
+Unit tests for MQTTClient message handling.
+
+Runs offline: synthetic paho MQTTMessage objects are fed straight to
+MQTTClient._on_message, no broker connection is made.
+"""
+
+import importlib
+import importlib.util
+import logging
+import math
+import sys
+
+import orjson
+import paho.mqtt.client as mqtt
+import pytest
+
+import app.mqtt_client
+from app.config import InfluxDBConfig, MQTTConfig
+from app.influx_client import InfluxClient
+from app.mqtt_client import MQTTClient
+
+
+TOPIC = "pse/weather_system/sensors"
+
+PAYLOAD = orjson.dumps({
+    "temperature": 23.5,
+    "humidity": 65.2,
+    "co2": 450.0,
+    "flammable_gas": 120.5,
+    "toxic_gas": 85.3,
+    "uv_index": 5.2,
+    "battery": 3.7,
+    "latitude": -23.55052,
+    "longitude": -46.633308,
+    "altitude": 760.0,
+    "satellites": 8,
+    "fix_quality": 1,
+})
+
+
+# ---------------------------------------------------------------------------
+# Test Fixtures
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(params=["msgspec", "orjson"])
+def decoder(request, monkeypatch):
+    """Reload app.mqtt_client with the given payload decoder tier forced."""
+    if request.param == "orjson":
+        monkeypatch.setitem(sys.modules, "msgspec", None)
+    elif importlib.util.find_spec("msgspec") is None:
+        pytest.skip("msgspec is not installed")
+    
+    module = importlib.reload(app.mqtt_client)
+    yield module._DECODER_NAME
+    
+    monkeypatch.undo()
+    importlib.reload(app.mqtt_client)
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def make_message(payload: bytes = PAYLOAD, dup: bool = False, topic: str = TOPIC) -> mqtt.MQTTMessage:
+    """Build an MQTTMessage as paho would hand it to on_message."""
+    msg = mqtt.MQTTMessage(mid=1, topic=topic.encode())
+    msg.payload = payload
+    msg.dup = dup
+    return msg
+
+
+class Recorder:
+    """MQTTClient under test plus the samples and raw payloads it forwarded."""
+    
+    def __init__(self, raw: bool = False, sample_every: int = 10):
+        self.samples = []
+        self.raw = []
+        self.client = MQTTClient(
+            config=MQTTConfig(topic=TOPIC),
+            on_sample_received=self.samples.append,
+            on_raw_message=(lambda p, ts: self.raw.append(p)) if raw else None,
+            sample_every=sample_every,
+        )
+    
+    def feed(self, *messages: mqtt.MQTTMessage) -> None:
+        for msg in messages:
+            self.client._on_message(self.client.client, None, msg)
+
+
+# ---------------------------------------------------------------------------
+# Test Cases
+# ---------------------------------------------------------------------------
+
+def test_valid_message_is_forwarded():
+    """A well-formed payload becomes a WeatherSample with a server timestamp."""
+    rec = Recorder()
+    
+    rec.feed(make_message())
+    
+    (sample,) = rec.samples
+    assert sample.temperature_c == 23.5
+    assert sample.air_quality_co2_ppm == 450.0
+    assert sample.gps_latitude == -23.55052
+    assert sample.gps_fix_quality == 1
+    assert sample.timestamp_ns > 0
+
+
+def test_dup_redelivery_is_dropped():
+    """A QoS 1 redelivery (dup=1) of a message already seen is ignored."""
+    rec = Recorder()
+    
+    rec.feed(make_message(), make_message(dup=True))
+    
+    assert len(rec.samples) == 1
+
+
+def test_non_dup_repeat_is_accepted():
+    """Identical readings not flagged as duplicates are separate samples."""
+    rec = Recorder()
+    
+    rec.feed(make_message(), make_message(), make_message())
+    
+    assert len(rec.samples) == 3
+
+
+def test_dup_of_unseen_message_is_accepted():
+    """dup=1 only drops payloads actually seen before on the same topic."""
+    rec = Recorder()
+    
+    rec.feed(make_message(), make_message(dup=True, topic=TOPIC + "/other"))
+    
+    assert len(rec.samples) == 2
+
+
+def test_empty_payload_is_skipped(caplog):
+    """Empty payloads (cleared retained messages) are skipped without errors."""
+    rec = Recorder(raw=True, sample_every=1)
+    
+    with caplog.at_level(logging.ERROR, logger="app.mqtt_client"):
+        rec.feed(make_message(b""))
+    
+    assert rec.samples == [] and rec.raw == []
+    assert caplog.records == []
+
+
+@pytest.mark.parametrize("payload", [
+    b"not json",
+    b'{"temperature": 23.5}',
+    b'{"temperature": "warm", "humidity": 65.0}',
+])
+def test_invalid_payload_is_logged_and_dropped(decoder, caplog, payload):
+    """Invalid payloads are logged and never reach the sample callback."""
+    rec = Recorder()
+    
+    with caplog.at_level(logging.ERROR, logger="app.mqtt_client"):
+        rec.feed(make_message(payload))
+    
+    assert rec.samples == []
+    assert len(caplog.records) == 1
+
+
+def test_nan_temperature_is_rejected(decoder, caplog):
+    """A NaN temperature fails the range check and is not forwarded."""
+    rec = Recorder()
+    payload = PAYLOAD.replace(b'"temperature":23.5', b'"temperature":"nan"')
+    
+    with caplog.at_level(logging.ERROR, logger="app.mqtt_client"):
+        rec.feed(make_message(payload))
+    
+    assert rec.samples == []
+    assert "Temp out of range" in caplog.text
+
+
+def test_nan_field_is_forwarded(decoder):
+    """NaN in an unchecked field is kept; the line protocol writer skips it."""
+    rec = Recorder()
+    payload = PAYLOAD.replace(b'"co2":450.0', b'"co2":"nan"')
+    
+    rec.feed(make_message(payload))
+    
+    (sample,) = rec.samples
+    assert math.isnan(sample.air_quality_co2_ppm)
+
+
+def test_sample_every_routes_nth_message_to_parser():
+    """With a raw callback, every Nth message is still fully parsed."""
+    rec = Recorder(raw=True, sample_every=3)
+    
+    rec.feed(*(make_message() for _ in range(7)))
+    
+    assert len(rec.samples) == 3  # messages 0, 3 and 6
+    assert len(rec.raw) == 4
+
+
+def test_sample_every_zero_never_parses():
+    """sample_every=0 hands every message to the raw callback."""
+    rec = Recorder(raw=True, sample_every=0)
+    
+    rec.feed(*(make_message() for _ in range(5)))
+    
+    assert rec.samples == []
+    assert len(rec.raw) == 5
+
+
+def test_sample_every_negative_is_rejected():
+    """A negative sample_every is a configuration error."""
+    with pytest.raises(ValueError, match="sample_every"):
+        Recorder(raw=True, sample_every=-1)
+
+
+def test_decoder_tier_is_forced(decoder):
+    """Each tier decodes the station payload into the same sample."""
+    rec = Recorder()
+    
+    rec.feed(make_message())
+    
+    assert app.mqtt_client._DECODER_NAME == decoder
+    (sample,) = rec.samples
+    assert sample.temperature_c == 23.5
+    assert sample.gps_satellites == 8
+
+
+@pytest.mark.parametrize("payload, label", [
+    (b"{oops", "Invalid JSON in MQTT message"),
+    (b"[1, 2]", "Failed to parse weather sample"),
+    (b'{"temperature": 23.5}', "Failed to parse weather sample"),
+    (orjson.dumps({"temperature": 500.0, "humidity": 65.0}), "Failed to parse weather sample"),
+])
+def test_decode_errors_are_classified(decoder, caplog, payload, label):
+    """Only malformed JSON is reported as such; schema and range errors are parse errors."""
+    rec = Recorder()
+    
+    with caplog.at_level(logging.ERROR, logger="app.mqtt_client"):
+        rec.feed(make_message(payload))
+    
+    assert rec.samples == []
+    assert [r.getMessage().split(":")[0] for r in caplog.records] == [label]
+
+
+@pytest.mark.parametrize("overrides, accepted", [
+    ({"co2": "450.5", "satellites": "8"}, True),
+    ({"satellites": 8.0, "fix_quality": 1.0}, True),
+    ({"co2": 450}, True),
+    ({"satellites": 8.7}, False),
+    ({"satellites": True}, False),
+    ({"temperature": True}, False),
+    ({"latitude": False}, False),
+    ({"co2": "high"}, False),
+])
+def test_parsed_and_raw_paths_agree(decoder, overrides, accepted):
+    """The parsed path and the raw line protocol path accept the same payloads."""
+    data = dict(orjson.loads(PAYLOAD), **overrides)
+    influx = InfluxClient(InfluxDBConfig(measurement="weather_data"))
+    rec = Recorder()
+    
+    rec.feed(make_message(orjson.dumps(data)))
+    try:
+        raw_line = influx._json_to_lp(data, 0)
+    except (KeyError, TypeError, ValueError):
+        raw_line = None
+    
+    assert bool(rec.samples) is accepted
+    assert (raw_line is not None) is accepted
+    if accepted:
+        (sample,) = rec.samples
+        assert raw_line == influx._fmt_lp(sample).rsplit(" ", 1)[0] + " 0"
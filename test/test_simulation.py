@@ -15,22 +15,31 @@ Usage:
 """
 
 import argparse
-import json
 import logging
+import math
 import os
-import random
 import signal
 import sys
+import threading
 import time
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from datetime import datetime
-from math import sin, cos, pi
 from typing import Optional
 
 # Add parent directory to path to import app modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import numpy as np
+import orjson
 import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+# Numba is optional: it only JIT-compiles the variation kernel for high rates
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 # Try to import config, but provide defaults if not available
 try:
@@ -61,7 +70,7 @@ logger = logging.getLogger(__name__)
 # Sensor Configuration
 # ---------------------------------------------------------------------------
 
-@dataclass
+@dataclass(frozen=True)
 class SensorConfig:
     """Configuration for a single sensor parameter."""
     min_value: float
@@ -73,6 +82,79 @@ class SensorConfig:
     cycle_amplitude: float = 0.0  # Amplitude of cyclic variation
 
 
+# Default sensor profiles, shared by every SimulationConfig (SensorConfig
+# is frozen, so sharing one instance is safe)
+_TEMP_CFG = SensorConfig(
+    min_value=15.0,
+    max_value=35.0,
+    baseline=23.0,
+    noise_amplitude=0.5,
+    trend_rate=0.001,  # Slow drift
+    cycle_period=3600.0,  # 1-hour cycle (simulating day/night)
+    cycle_amplitude=5.0,
+)
+
+_HUM_CFG = SensorConfig(
+    min_value=30.0,
+    max_value=90.0,
+    baseline=65.0,
+    noise_amplitude=1.0,
+    trend_rate=-0.0005,  # Inverse correlation with temp
+    cycle_period=3600.0,
+    cycle_amplitude=10.0,
+)
+
+_CO2_CFG = SensorConfig(
+    min_value=400.0,
+    max_value=2000.0,
+    baseline=450.0,
+    noise_amplitude=20.0,
+    trend_rate=0.005,
+    cycle_period=1800.0,  # 30-minute cycle
+    cycle_amplitude=100.0,
+)
+
+_FLAM_CFG = SensorConfig(
+    min_value=50.0,
+    max_value=500.0,
+    baseline=120.0,
+    noise_amplitude=10.0,
+    trend_rate=0.0,
+    cycle_period=0.0,  # No cycle, just noise
+    cycle_amplitude=0.0,
+)
+
+_TOX_CFG = SensorConfig(
+    min_value=50.0,
+    max_value=300.0,
+    baseline=85.0,
+    noise_amplitude=5.0,
+    trend_rate=0.0,
+    cycle_period=0.0,
+    cycle_amplitude=0.0,
+)
+
+_UV_CFG = SensorConfig(
+    min_value=0.0,
+    max_value=11.0,
+    baseline=5.0,
+    noise_amplitude=0.3,
+    trend_rate=0.0,
+    cycle_period=7200.0,  # 2-hour cycle (sun position)
+    cycle_amplitude=3.0,
+)
+
+_BAT_CFG = SensorConfig(
+    min_value=3.0,
+    max_value=4.2,
+    baseline=3.7,
+    noise_amplitude=0.02,
+    trend_rate=-0.00001,  # Slow discharge
+    cycle_period=0.0,
+    cycle_amplitude=0.0,
+)
+
+
 @dataclass
 class SimulationConfig:
     """Complete simulation configuration."""
@@ -82,79 +164,31 @@ class SimulationConfig:
     mqtt_port: int = DEFAULT_MQTT_PORT
     mqtt_topic: str = DEFAULT_MQTT_TOPIC
     
+    # Best-effort telemetry by default: QoS 0 over MQTT v5 (3 = v3.1.1)
+    mqtt_qos: int = 0
+    mqtt_protocol: int = 5
+    
     # Simulation settings
     sample_rate: float = 1.0  # Samples per second (0.5 = every 2 seconds)
     
-    # Sensor configurations
-    temperature: SensorConfig = field(default_factory=lambda: SensorConfig(
-        min_value=15.0,
-        max_value=35.0,
-        baseline=23.0,
-        noise_amplitude=0.5,
-        trend_rate=0.001,  # Slow drift
-        cycle_period=3600.0,  # 1-hour cycle (simulating day/night)
-        cycle_amplitude=5.0,
-    ))
-    
-    humidity: SensorConfig = field(default_factory=lambda: SensorConfig(
-        min_value=30.0,
-        max_value=90.0,
-        baseline=65.0,
-        noise_amplitude=1.0,
-        trend_rate=-0.0005,  # Inverse correlation with temp
-        cycle_period=3600.0,
-        cycle_amplitude=10.0,
-    ))
-    
-    co2: SensorConfig = field(default_factory=lambda: SensorConfig(
-        min_value=400.0,
-        max_value=2000.0,
-        baseline=450.0,
-        noise_amplitude=20.0,
-        trend_rate=0.005,
-        cycle_period=1800.0,  # 30-minute cycle
-        cycle_amplitude=100.0,
-    ))
-    
-    flammable_gas: SensorConfig = field(default_factory=lambda: SensorConfig(
-        min_value=50.0,
-        max_value=500.0,
-        baseline=120.0,
-        noise_amplitude=10.0,
-        trend_rate=0.0,
-        cycle_period=0.0,  # No cycle, just noise
-        cycle_amplitude=0.0,
-    ))
-    
-    toxic_gas: SensorConfig = field(default_factory=lambda: SensorConfig(
-        min_value=50.0,
-        max_value=300.0,
-        baseline=85.0,
-        noise_amplitude=5.0,
-        trend_rate=0.0,
-        cycle_period=0.0,
-        cycle_amplitude=0.0,
-    ))
-    
-    uv_index: SensorConfig = field(default_factory=lambda: SensorConfig(
-        min_value=0.0,
-        max_value=11.0,
-        baseline=5.0,
-        noise_amplitude=0.3,
-        trend_rate=0.0,
-        cycle_period=7200.0,  # 2-hour cycle (sun position)
-        cycle_amplitude=3.0,
-    ))
-    
-    battery: SensorConfig = field(default_factory=lambda: SensorConfig(
-        min_value=3.0,
-        max_value=4.2,
-        baseline=3.7,
-        noise_amplitude=0.02,
-        trend_rate=-0.00001,  # Slow discharge
-        cycle_period=0.0,
-        cycle_amplitude=0.0,
-    ))
+    # Publish batching: samples are buffered and published back-to-back
+    # (one message each) once batch_size is reached or batch_ms has passed
+    # (0 = no age limit). Publishing is non-blocking either way, so batching
+    # only adds latency and is off unless asked for.
+    batch_size: int = 1
+    batch_ms: float = 0.0
+    
+    # Random seed for reproducible runs (None = unpredictable)
+    seed: Optional[int] = None
+    
+    # Sensor configurations (shared, immutable defaults)
+    temperature: SensorConfig = _TEMP_CFG
+    humidity: SensorConfig = _HUM_CFG
+    co2: SensorConfig = _CO2_CFG
+    flammable_gas: SensorConfig = _FLAM_CFG
+    toxic_gas: SensorConfig = _TOX_CFG
+    uv_index: SensorConfig = _UV_CFG
+    battery: SensorConfig = _BAT_CFG
     
     # GPS settings
     gps_enabled: bool = True
@@ -170,160 +204,174 @@ class SimulationConfig:
 # Sensor Simulator
 # ---------------------------------------------------------------------------
 
+# Slot of each sensor in the simulator's parameter and state arrays
+TEMP, HUM, CO2, FLAM, TOX, UV, BAT = range(7)
+N_SENSORS = 7
+
+# Fixed-schema JSON payload templates, filled with bytes %-formatting
+_FMT = (
+    b'{"temperature":%.2f,"humidity":%.2f,"co2":%.1f,"flammable_gas":%.1f,'
+    b'"toxic_gas":%.1f,"uv_index":%.2f,"battery":%.3f%s}'
+)
+_GPS_FMT = (
+    b',"latitude":%.6f,"longitude":%.6f,"altitude":%.1f,'
+    b'"satellites":%d,"fix_quality":1'
+)
+
+# Sample rate (samples/sec) above which the JIT kernel is used, if available
+JIT_MIN_RATE = 100.0
+
+
+def _variation_kernel(baseline, trend, trend_rate, omega, cycle_amp,
+                      noise_lo, noise_span, lo, hi, elapsed, u, out):
+    """
+    Scalar-loop form of the vectorized update in generate_sample.
+    
+    Advances trend in place and writes the clamped sensor values to out.
+    Noise comes in as uniform draws u (from the simulator's generator) so
+    both paths stay reproducible under the same seed.
+    """
+    for i in range(baseline.size):
+        trend[i] += trend_rate[i]
+        v = (baseline[i] + trend[i]
+             + math.sin(omega[i] * elapsed) * cycle_amp[i]
+             + noise_lo[i] + noise_span[i] * u[i])
+        if v < lo[i]:
+            v = lo[i]
+        elif v > hi[i]:
+            v = hi[i]
+        out[i] = v
+
+
+if njit is not None:
+    _variation_kernel = njit(cache=True, fastmath=True)(_variation_kernel)
+
 class WeatherSimulator:
     """
     Simulates realistic weather sensor data with trends, cycles, and noise.
     """
     
-    def __init__(self, config: SimulationConfig):
+    def __init__(self, config: SimulationConfig, seed: Optional[int] = None):
         """
         Initialize the simulator.
         
         Args:
             config: Simulation configuration
+            seed: Random seed, for reproducible runs (None = unpredictable)
         """
         self.config = config
-        self.start_time = time.time()
+        # Monotonic, so wall-clock jumps don't warp the cycle phase
+        self.start_time = time.monotonic()
         self.sample_count = 0
         
-        # Current sensor states (accumulated trends)
-        self.current_trend = {
-            "temperature": 0.0,
-            "humidity": 0.0,
-            "co2": 0.0,
-            "flammable_gas": 0.0,
-            "toxic_gas": 0.0,
-            "uv_index": 0.0,
-            "battery": 0.0,
-        }
-    
-    def _apply_variation(
-        self,
-        sensor_config: SensorConfig,
-        current_trend: float,
-        elapsed_time: float,
-    ) -> tuple[float, float]:
-        """
-        Apply realistic variations to a sensor value.
-        
-        Args:
-            sensor_config: Configuration for this sensor
-            current_trend: Current accumulated trend
-            elapsed_time: Time since simulation start
-            
-        Returns:
-            Tuple of (value, new_trend)
-        """
-        # Start with baseline
-        value = sensor_config.baseline
+        # Sensor parameters as parallel arrays (structure of arrays), so all
+        # sensors are updated in one vectorized pass per sample; listed in
+        # slot order (TEMP, HUM, CO2, FLAM, TOX, UV, BAT)
+        sensors = (
+            config.temperature,
+            config.humidity,
+            config.co2,
+            config.flammable_gas,
+            config.toxic_gas,
+            config.uv_index,
+            config.battery,
+        )
+        self._baseline = np.array([s.baseline for s in sensors], dtype=np.float64)
+        self._trend_rate = np.array([s.trend_rate for s in sensors], dtype=np.float64)
+        self._cycle_period = np.array([s.cycle_period for s in sensors], dtype=np.float64)
+        self._cycle_amp = np.array([s.cycle_amplitude for s in sensors], dtype=np.float64)
+        self._noise_amp = np.array([s.noise_amplitude for s in sensors], dtype=np.float64)
+        self._lo = np.array([s.min_value for s in sensors], dtype=np.float64)
+        self._hi = np.array([s.max_value for s in sensors], dtype=np.float64)
         
-        # Add trend (accumulated drift)
-        current_trend += sensor_config.trend_rate
-        value += current_trend
+        # Angular frequency per sensor (0 for sensors without a cycle, so
+        # their sine term vanishes) and the noise range as offset + span
+        self._omega = np.divide(
+            2 * np.pi,
+            self._cycle_period,
+            out=np.zeros_like(self._cycle_period),
+            where=self._cycle_period > 0,
+        )
+        self._noise_lo = -self._noise_amp
+        self._noise_span = 2 * self._noise_amp
         
-        # Add cyclic variation (simulating day/night, etc.)
-        if sensor_config.cycle_period > 0:
-            phase = (elapsed_time % sensor_config.cycle_period) / sensor_config.cycle_period
-            cycle_value = sin(2 * pi * phase) * sensor_config.cycle_amplitude
-            value += cycle_value
+        # Current sensor states (accumulated trends)
+        self._trend = np.zeros(N_SENSORS)
         
-        # Add random noise
-        if sensor_config.noise_amplitude > 0:
-            noise = random.uniform(
-                -sensor_config.noise_amplitude,
-                sensor_config.noise_amplitude
-            )
-            value += noise
+        # Per-simulator generator: no shared global state or locking
+        self._rng = np.random.default_rng(seed)
         
-        # Clamp to valid range
-        value = max(sensor_config.min_value, min(sensor_config.max_value, value))
+        # GPS jitter bounds (latitude, longitude, altitude), drawn in one call
+        gps_noise = config.gps_noise
+        self._gps_lo = np.array([-gps_noise, -gps_noise, -2.0])
+        self._gps_hi = np.array([gps_noise, gps_noise, 2.0])
         
-        return value, current_trend
+        # At high rates numpy's per-call overhead dominates on 7-element
+        # arrays; use the compiled kernel and its output buffer instead
+        self._use_kernel = njit is not None and config.sample_rate > JIT_MIN_RATE
+        self._out = np.empty(N_SENSORS)
+        if self._use_kernel:
+            logger.info("Using JIT variation kernel (rate > %.0f/s)", JIT_MIN_RATE)
     
-    def generate_sample(self) -> dict:
+    def generate_sample(self, now: Optional[float] = None) -> bytes:
         """
         Generate a single weather sample with realistic variations.
         
+        Args:
+            now: Current time.monotonic() reading, if the caller already
+                has one (read here otherwise)
+        
         Returns:
-            Dictionary representing a weather sample
+            The sample as a JSON object (UTF-8 bytes), ready to publish
         """
-        elapsed_time = time.time() - self.start_time
+        if now is None:
+            now = time.monotonic()
+        elapsed_time = now - self.start_time
         self.sample_count += 1
         
-        # Generate each sensor value
-        temperature, self.current_trend["temperature"] = self._apply_variation(
-            self.config.temperature,
-            self.current_trend["temperature"],
-            elapsed_time,
-        )
-        
-        humidity, self.current_trend["humidity"] = self._apply_variation(
-            self.config.humidity,
-            self.current_trend["humidity"],
-            elapsed_time,
-        )
-        
-        co2, self.current_trend["co2"] = self._apply_variation(
-            self.config.co2,
-            self.current_trend["co2"],
-            elapsed_time,
-        )
-        
-        flammable_gas, self.current_trend["flammable_gas"] = self._apply_variation(
-            self.config.flammable_gas,
-            self.current_trend["flammable_gas"],
-            elapsed_time,
-        )
-        
-        toxic_gas, self.current_trend["toxic_gas"] = self._apply_variation(
-            self.config.toxic_gas,
-            self.current_trend["toxic_gas"],
-            elapsed_time,
-        )
-        
-        uv_index, self.current_trend["uv_index"] = self._apply_variation(
-            self.config.uv_index,
-            self.current_trend["uv_index"],
-            elapsed_time,
-        )
+        # Generate all sensor values: baseline + accumulated drift +
+        # cyclic variation (day/night, etc.) + random noise, then clamp
+        if self._use_kernel:
+            values = self._out
+            _variation_kernel(
+                self._baseline, self._trend, self._trend_rate, self._omega,
+                self._cycle_amp, self._noise_lo, self._noise_span,
+                self._lo, self._hi, elapsed_time,
+                self._rng.random(N_SENSORS), values,
+            )
+        else:
+            self._trend += self._trend_rate
+            values = (
+                self._baseline
+                + self._trend
+                + np.sin(self._omega * elapsed_time) * self._cycle_amp
+                + self._noise_lo
+                + self._noise_span * self._rng.random(N_SENSORS)
+            )
+            np.clip(values, self._lo, self._hi, out=values)
         
-        battery, self.current_trend["battery"] = self._apply_variation(
-            self.config.battery,
-            self.current_trend["battery"],
-            elapsed_time,
-        )
+        vals = values.tolist()
         
         # Generate GPS data (if enabled)
-        gps_data = {}
+        gps = b""
         if self.config.gps_enabled:
-            gps_data = {
-                "latitude": self.config.gps_latitude + random.uniform(
-                    -self.config.gps_noise, self.config.gps_noise
-                ),
-                "longitude": self.config.gps_longitude + random.uniform(
-                    -self.config.gps_noise, self.config.gps_noise
-                ),
-                "altitude": self.config.gps_altitude + random.uniform(-2.0, 2.0),
-                "satellites": random.randint(
+            d_lat, d_lon, d_alt = self._rng.uniform(self._gps_lo, self._gps_hi).tolist()
+            gps = _GPS_FMT % (
+                self.config.gps_latitude + d_lat,
+                self.config.gps_longitude + d_lon,
+                self.config.gps_altitude + d_alt,
+                int(self._rng.integers(
                     self.config.gps_satellites_min,
-                    self.config.gps_satellites_max,
-                ),
-                "fix_quality": 1,
-            }
-        
-        # Construct the sample
-        sample = {
-            "temperature": round(temperature, 2),
-            "humidity": round(humidity, 2),
-            "co2": round(co2, 1),
-            "flammable_gas": round(flammable_gas, 1),
-            "toxic_gas": round(toxic_gas, 1),
-            "uv_index": round(uv_index, 2),
-            "battery": round(battery, 3),
-            **gps_data,
-        }
+                    self.config.gps_satellites_max + 1,
+                )),
+            )
         
-        return sample
+        # Format the payload straight from the values (schema is fixed,
+        # so there is no intermediate dict to build and serialize)
+        return _FMT % (
+            vals[TEMP], vals[HUM], vals[CO2], vals[FLAM],
+            vals[TOX], vals[UV], vals[BAT], gps,
+        )
 
 
 # ---------------------------------------------------------------------------
@@ -343,37 +391,73 @@ class MQTTSimulator:
             sim_config: Simulation configuration
         """
         self.config = sim_config
-        self.simulator = WeatherSimulator(sim_config)
+        self.simulator = WeatherSimulator(sim_config, seed=sim_config.seed)
         
         # MQTT client
         self.client = mqtt.Client(
             client_id="weather_simulator",
-            protocol=mqtt.MQTTv311,
+            protocol=mqtt.MQTTv5 if sim_config.mqtt_protocol == 5 else mqtt.MQTTv311,
         )
         
+        # Let batched QoS 1/2 publishes pipeline instead of stalling at paho's
+        # default of 20 unacknowledged messages (moot for QoS 0), with an
+        # unbounded outgoing queue and capped reconnect back-off
+        self.client.max_inflight_messages_set(int(os.getenv("MQTT_MAX_INFLIGHT", "1000")))
+        self.client.max_queued_messages_set(0)
+        self.client.reconnect_delay_set(min_delay=1, max_delay=30)
+        
+        # MQTT v5 topic alias (QoS 0 only, as stored QoS 1/2 messages could
+        # be resent with an empty topic after the alias is gone). Set up in
+        # _on_connect when the broker allows it; the first publish on each
+        # connection binds alias 1 to the topic, later ones send "" + alias.
+        # _alias_lock keeps the network thread's per-connection reset and the
+        # publisher's choose-topic/publish/mark-bound step from interleaving.
+        self._alias_lock = threading.Lock()
+        self._alias_props: Optional[Properties] = None
+        self._alias_bound = False
+        
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
         
-        self.connected = False
+        # Set by the network thread on CONNACK; connect() blocks on it
+        self._connected = threading.Event()
         self.running = False
         self.samples_published = 0
         self.publish_errors = 0
     
-    def _on_connect(self, client, userdata, flags, rc):
+    @property
+    def connected(self) -> bool:
+        """Whether the broker has acknowledged the connection."""
+        return self._connected.is_set()
+    
+    def _on_connect(self, client, userdata, flags, rc, properties=None):
         """Callback when connected to MQTT broker."""
         if rc == 0:
             logger.info("✓ Connected to MQTT broker at %s:%d",
                        self.config.mqtt_host, self.config.mqtt_port)
-            self.connected = True
+            
+            # Aliases are per connection: re-register on every (re)connect
+            alias_max = getattr(properties, "TopicAliasMaximum", 0) if properties else 0
+            props = None
+            if self.config.mqtt_qos == 0 and alias_max >= 1:
+                props = Properties(PacketTypes.PUBLISH)
+                props.TopicAlias = 1
+            with self._alias_lock:
+                self._alias_props = props
+                self._alias_bound = False
+            
+            self._connected.set()
         else:
-            logger.error("✗ MQTT connection failed with code %d", rc)
-            self.connected = False
+            logger.error("✗ MQTT connection failed with code %s", rc)
+            self._connected.clear()
     
-    def _on_disconnect(self, client, userdata, rc):
+    def _on_disconnect(self, client, userdata, rc, properties=None):
         """Callback when disconnected from MQTT broker."""
-        self.connected = False
+        self._connected.clear()
+        with self._alias_lock:
+            self._alias_bound = False
         if rc != 0:
-            logger.warning("Unexpected disconnection from MQTT broker (code %d)", rc)
+            logger.warning("Unexpected disconnection from MQTT broker (code %s)", rc)
         else:
             logger.info("Disconnected from MQTT broker")
     
@@ -390,13 +474,8 @@ class MQTTSimulator:
             )
             self.client.loop_start()
             
-            # Wait for connection
-            timeout = 10
-            start = time.time()
-            while not self.connected and (time.time() - start) < timeout:
-                time.sleep(0.1)
-            
-            if not self.connected:
+            # Wait for CONNACK (woken as soon as it arrives)
+            if not self._connected.wait(timeout=10):
                 raise ConnectionError("Failed to connect to MQTT broker")
                 
         except Exception as exc:
@@ -410,8 +489,16 @@ class MQTTSimulator:
         logger.info("=" * 70)
         logger.info("Configuration:")
         logger.info("  Topic: %s", self.config.mqtt_topic)
+        logger.info("  Protocol: MQTT v%s, QoS %d%s",
+                   "5" if self.config.mqtt_protocol == 5 else "3.1.1",
+                   self.config.mqtt_qos,
+                   " (topic alias)" if self._alias_props is not None else "")
         logger.info("  Sample rate: %.2f samples/sec", self.config.sample_rate)
         logger.info("  Interval: %.2f seconds", 1.0 / self.config.sample_rate)
+        if self.config.batch_ms > 0:
+            logger.info("  Batch: %d samples / %.0f ms", self.config.batch_size, self.config.batch_ms)
+        else:
+            logger.info("  Batch: %d samples (no age limit)", self.config.batch_size)
         logger.info("=" * 70)
         logger.info("Press Ctrl+C to stop")
         logger.info("=" * 70)
@@ -419,55 +506,103 @@ class MQTTSimulator:
         self.running = True
         interval = 1.0 / self.config.sample_rate
         
+        # Samples waiting to be published, flushed by size or age
+        # (batch_ms <= 0: by size only)
+        pending: list[bytes] = []
+        batch_window = self.config.batch_ms / 1000.0 if self.config.batch_ms > 0 else math.inf
+        last_flush = time.monotonic()
+        
+        # Deadlines advance by a fixed interval on the monotonic clock, so
+        # the rate neither drifts with work time nor jumps with wall-clock
+        deadline = time.monotonic()
+        
         try:
             while self.running:
-                start_time = time.time()
+                # One clock read per tick drives generation and batching
+                now = time.monotonic()
                 
                 # Generate sample
-                sample = self.simulator.generate_sample()
-                
-                # Publish to MQTT
-                try:
-                    payload = json.dumps(sample)
-                    result = self.client.publish(
-                        self.config.mqtt_topic,
-                        payload,
-                        qos=1,
-                    )
-                    
-                    if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                        self.samples_published += 1
-                        
-                        # Log every 10 samples
-                        if self.samples_published % 10 == 0:
-                            logger.info(
-                                "[%d] Published | T: %.1f°C | H: %.1f%% | "
-                                "CO2: %.0f ppm | Battery: %.2fV",
-                                self.samples_published,
-                                sample["temperature"],
-                                sample["humidity"],
-                                sample["co2"],
-                                sample["battery"],
-                            )
-                    else:
-                        self.publish_errors += 1
-                        logger.error("Publish failed with code %d", result.rc)
+                pending.append(self.simulator.generate_sample(now))
                 
-                except Exception as exc:
-                    self.publish_errors += 1
-                    logger.error("Error publishing sample: %s", exc)
+                # Publish the batch once it is full or old enough
+                if (len(pending) >= self.config.batch_size
+                        or now - last_flush >= batch_window):
+                    self._publish_batch(pending)
+                    pending.clear()
+                    last_flush = now
                 
-                # Sleep to maintain sample rate
-                elapsed = time.time() - start_time
-                sleep_time = max(0, interval - elapsed)
-                time.sleep(sleep_time)
+                # Sleep until the next deadline to maintain sample rate
+                deadline += interval
+                sleep_time = deadline - time.monotonic()
+                if sleep_time > 0:
+                    time.sleep(sleep_time)
+                elif sleep_time < -interval:
+                    # Fell behind by more than a tick: resync instead of bursting
+                    deadline = time.monotonic()
         
         except KeyboardInterrupt:
             logger.info("\nKeyboard interrupt received")
         
         finally:
+            if pending:
+                self._publish_batch(pending)
             self.stop()
     
+    def _publish_batch(self, samples: list[bytes]) -> None:
+        """
+        Publish buffered samples back-to-back, one MQTT message each.
+        
+        QoS 1 publishes are pipelined: paho sends them without waiting for
+        each PUBACK, so the broker round-trip is shared by the whole batch
+        (QoS 0 has no acknowledgement at all). The app still receives one
+        JSON object per message.
+        
+        Args:
+            samples: JSON payloads to publish, oldest first
+        """
+        qos = self.config.mqtt_qos
+        
+        for payload in samples:
+            try:
+                # Under the lock, so a reconnect can't reset the alias between
+                # choosing "" and sending, or after sending but before marking
+                # it bound (publish() only queues the packet, it never blocks)
+                with self._alias_lock:
+                    props = self._alias_props
+                    result = self.client.publish(
+                        "" if props is not None and self._alias_bound else self.config.mqtt_topic,
+                        payload,
+                        qos=qos,
+                        properties=props,
+                    )
+                    if props is not None and result.rc == mqtt.MQTT_ERR_SUCCESS:
+                        self._alias_bound = True
+                
+                if result.rc == mqtt.MQTT_ERR_SUCCESS:
+                    self.samples_published += 1
+                    
+                    # Log every 10 samples (skip building the args when INFO is off;
+                    # only these logged payloads are parsed back)
+                    if (self.samples_published % 10 == 0
+                            and logger.isEnabledFor(logging.INFO)):
+                        sample = orjson.loads(payload)
+                        logger.info(
+                            "[%d] Published | T: %.1f°C | H: %.1f%% | "
+                            "CO2: %.0f ppm | Battery: %.2fV",
+                            self.samples_published,
+                            sample["temperature"],
+                            sample["humidity"],
+                            sample["co2"],
+                            sample["battery"],
+                        )
+                else:
+                    self.publish_errors += 1
+                    logger.error("Publish failed with code %d", result.rc)
+            
+            except Exception as exc:
+                self.publish_errors += 1
+                logger.error("Error publishing sample: %s", exc)
+    
     def stop(self) -> None:
         """Stop the simulator and disconnect."""
         self.running = False
@@ -525,6 +660,43 @@ def parse_args():
         help="Sample rate in samples/second (default: 1.0)",
     )
     
+    parser.add_argument(
+        "--qos",
+        type=int,
+        choices=(0, 1, 2),
+        default=0,
+        help="Publish QoS (default: 0; use 1 for real ingest)",
+    )
+    
+    parser.add_argument(
+        "--protocol",
+        type=int,
+        choices=(3, 5),
+        default=5,
+        help="MQTT protocol: 3 = v3.1.1, 5 = v5 (default: 5)",
+    )
+    
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Publish once this many samples are buffered (default: 1)",
+    )
+    
+    parser.add_argument(
+        "--batch-ms",
+        type=float,
+        default=0.0,
+        help="Publish buffered samples at least every N ms (default: 0 = no age limit)",
+    )
+    
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Random seed for reproducible data (default: unseeded)",
+    )
+    
     parser.add_argument(
         "--no-gps",
         action="store_true",
@@ -543,7 +715,12 @@ def main():
         mqtt_host=args.host,
         mqtt_port=args.port,
         mqtt_topic=args.topic,
+        mqtt_qos=args.qos,
+        mqtt_protocol=args.protocol,
         sample_rate=args.rate,
+        batch_size=args.batch_size,
+        batch_ms=args.batch_ms,
+        seed=args.seed,
         gps_enabled=not args.no_gps,
     )
     
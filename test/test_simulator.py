@@ -0,0 +1,161 @@
+"""
+Unit tests for the WeatherSimulator used by the MQTT load simulator.
+
+Runs offline: samples are generated in-process with fixed seeds and
+timestamps, nothing is published.
+"""
+
+import json
+
+import paho.mqtt.client as mqtt
+import pytest
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from test.test_simulation import MQTTSimulator, SimulationConfig, WeatherSimulator
+
+
+SEED = 42
+N_SAMPLES = 50
+
+SENSOR_KEYS = {
+    "temperature", "humidity", "co2", "flammable_gas",
+    "toxic_gas", "uv_index", "battery",
+}
+GPS_KEYS = {"latitude", "longitude", "altitude", "satellites", "fix_quality"}
+
+# Resolution of each field in the payload template (see _FMT / _GPS_FMT)
+RESOLUTION = {
+    "temperature": 0.01, "humidity": 0.01, "co2": 0.1, "flammable_gas": 0.1,
+    "toxic_gas": 0.1, "uv_index": 0.01, "battery": 0.001,
+    "latitude": 1e-6, "longitude": 1e-6, "altitude": 0.1,
+}
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def make_simulator(use_kernel: bool = False, seed: int = SEED, **config) -> WeatherSimulator:
+    """Build a seeded simulator with a fixed start time and forced update path."""
+    simulator = WeatherSimulator(SimulationConfig(**config), seed=seed)
+    simulator.start_time = 0.0
+    simulator._use_kernel = use_kernel
+    return simulator
+
+
+def generate(simulator: WeatherSimulator, n: int = N_SAMPLES) -> list:
+    """Generate n payloads at fixed, evenly spaced timestamps."""
+    return [simulator.generate_sample(now=i * 37.5) for i in range(n)]
+
+
+class FakePublish:
+    """Stand-in for paho's Client.publish that records the topics sent."""
+    
+    def __init__(self):
+        self.topics = []
+    
+    def __call__(self, topic, payload, qos=0, properties=None):
+        self.topics.append(topic)
+        info = mqtt.MQTTMessageInfo(len(self.topics))
+        info.rc = mqtt.MQTT_ERR_SUCCESS
+        return info
+
+
+def connack(alias_max: int = 10) -> Properties:
+    """CONNACK properties from a broker allowing alias_max topic aliases."""
+    props = Properties(PacketTypes.CONNACK)
+    props.TopicAliasMaximum = alias_max
+    return props
+
+
+# ---------------------------------------------------------------------------
+# Test Cases
+# ---------------------------------------------------------------------------
+
+def test_same_seed_gives_identical_bytes():
+    """A fixed seed reproduces the exact payloads, on both update paths."""
+    assert generate(make_simulator(seed=SEED)) == generate(make_simulator(seed=SEED))
+    assert generate(make_simulator(True, seed=SEED)) == generate(make_simulator(True, seed=SEED))
+    assert generate(make_simulator(seed=SEED)) != generate(make_simulator(seed=SEED + 1))
+
+
+def test_kernel_matches_numpy_path():
+    """The variation kernel and the vectorized numpy update agree."""
+    numpy_path = generate(make_simulator(use_kernel=False))
+    kernel_path = generate(make_simulator(use_kernel=True))
+    
+    for a, b in zip(map(json.loads, numpy_path), map(json.loads, kernel_path)):
+        assert a.keys() == b.keys()
+        for key, value in a.items():
+            # Allow one formatting step for last-bit differences in sin()
+            assert b[key] == pytest.approx(value, abs=RESOLUTION.get(key, 0) * 1.01)
+
+
+@pytest.mark.parametrize("use_kernel", [False, True])
+def test_payload_is_valid_json(use_kernel):
+    """Templated payloads parse as JSON with the full schema, in range."""
+    config = SimulationConfig()
+    
+    for payload in generate(make_simulator(use_kernel)):
+        data = json.loads(payload)
+        
+        assert data.keys() == SENSOR_KEYS | GPS_KEYS
+        assert config.temperature.min_value <= data["temperature"] <= config.temperature.max_value
+        assert config.humidity.min_value <= data["humidity"] <= config.humidity.max_value
+        assert config.battery.min_value <= data["battery"] <= config.battery.max_value
+        assert data["latitude"] == pytest.approx(config.gps_latitude, abs=1e-4)
+        assert isinstance(data["satellites"], int)
+        assert config.gps_satellites_min <= data["satellites"] <= config.gps_satellites_max
+        assert data["fix_quality"] == 1
+
+
+def test_payload_without_gps():
+    """With GPS disabled only the sensor fields are emitted."""
+    data = json.loads(make_simulator(gps_enabled=False).generate_sample(now=0.0))
+    
+    assert data.keys() == SENSOR_KEYS
+
+
+def test_topic_alias_is_rebound_after_reconnect():
+    """The first publish after every CONNACK sends the full topic again."""
+    publisher = MQTTSimulator(SimulationConfig(mqtt_qos=0))
+    publisher.client.publish = publish = FakePublish()
+    topic = publisher.config.mqtt_topic
+    
+    publisher._on_connect(None, None, {}, 0, connack())
+    publisher._publish_batch([b"{}"] * 3)
+    publisher._on_disconnect(None, None, 1)
+    publisher._publish_batch([b"{}"])
+    publisher._on_connect(None, None, {}, 0, connack())
+    publisher._publish_batch([b"{}"] * 2)
+    
+    assert publish.topics == [topic, "", "", topic, topic, ""]
+
+
+@pytest.mark.parametrize("batch_size", [1, 5])
+def test_batch_size_alone_batches_by_size(batch_size):
+    """Without batch_ms, samples are published in batches of batch_size."""
+    n = 10
+    publisher = MQTTSimulator(SimulationConfig(sample_rate=1e6, batch_size=batch_size))
+    publisher.client.publish = FakePublish()
+    batches = []
+    publish_batch = publisher._publish_batch
+    generate_sample = publisher.simulator.generate_sample
+    
+    def record_batch(samples):
+        batches.append(len(samples))
+        publish_batch(samples)
+    
+    def generate_n(now):
+        # Stop the loop once n samples have been generated
+        if publisher.simulator.sample_count == n - 1:
+            publisher.running = False
+        return generate_sample(now)
+    
+    publisher._publish_batch = record_batch
+    publisher.simulator.generate_sample = generate_n
+    publisher.start()
+    
+    assert batches == [batch_size] * (n // batch_size)
+    assert publisher.samples_published == n